@@ -0,0 +1,67 @@
+"""Benchmark point-in-room location: testing every room vs. poly.PolygonIndex
+
+Runs under CPython or IronPython, no Revit required:
+    python benchmarks/locator.py [rooms] [points]
+"""
+
+import math
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import poly
+
+
+def synthetic_level(rooms):
+    # a grid of rectangular rooms with a few L-shaped ones, separated by 0.3 wide walls
+    columns = int(math.ceil(math.sqrt(rooms)))
+    items = []
+    for i in range(rooms):
+        x, y = 6.0 * (i % columns), 6.0 * (i // columns)
+        w, h = random.uniform(3, 5.7), random.uniform(3, 5.7)
+        if i % 7:
+            pts = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        else:
+            pts = [(x, y), (x + w, y), (x + w, y + h / 2), (x + w / 2, y + h / 2), (x + w / 2, y + h), (x, y + h)]
+        items.append((i, [poly.to_xy(pts)]))
+    return items, 6.0 * columns
+
+
+def scan(items, x, y):
+    # the previous approach: ask every room until one contains the point
+    for key, loops in items:
+        if poly.contains_loops(loops, x, y):
+            return key
+    return None
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    random.seed(1)
+    items, size = synthetic_level(rooms)
+    points = [(random.uniform(0, size), random.uniform(0, size)) for i in range(count)]
+
+    start = timer()
+    scanned = [scan(items, x, y) for x, y in points]
+    t_scan = timer() - start
+
+    start = timer()
+    index = poly.PolygonIndex(items)
+    t_build = timer() - start
+
+    start = timer()
+    located = index.locate_many(points)
+    t_locate = timer() - start
+
+    assert scanned == located
+    print("{} rooms, {} points, {} inside a room".format(rooms, count, len([k for k in located if k is not None])))
+    print("scan every room: {:.3f}s".format(t_scan))
+    print("polygon index:   {:.3f}s build, {:.3f}s queries".format(t_build, t_locate))
+
+
+if __name__ == "__main__":
+    main()
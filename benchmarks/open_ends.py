@@ -0,0 +1,92 @@
+"""Benchmark open end detection: linear scan vs. spatial.open_ends (short list, then PointGrid)
+
+Runs under CPython or IronPython, no Revit required:
+    python benchmarks/open_ends.py [rooms] [segments per room]
+"""
+
+import math
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import spatial
+
+
+def synthetic_room(n, origin, jitter=0.0005, gap=False):
+    # closed polygon with n segments; endpoints jittered below tolerance
+    cx, cy = origin
+    pts = [(cx + 10 * math.cos(2 * math.pi * i / n), cy + 10 * math.sin(2 * math.pi * i / n), 0.0)
+           for i in range(n)]
+    segments = []
+    for i in range(n):
+        a = pts[i]
+        b = pts[(i + 1) % n]
+        b = (b[0] + random.uniform(-jitter, jitter), b[1] + random.uniform(-jitter, jitter), 0.0)
+        segments.append((a, b))
+    if gap:
+        segments.pop()
+    return segments
+
+
+def linear_open_ends(segments, tol=0.003):
+    # the previous algorithm: linear scan of the open list for every endpoint
+    endpoints = []
+    for seg in segments:
+        for pt in seg:
+            for el in endpoints:
+                if (pt[0] - el[0]) ** 2 + (pt[1] - el[1]) ** 2 + (pt[2] - el[2]) ** 2 <= tol * tol:
+                    endpoints.remove(el)
+                    break
+            else:
+                endpoints.append(pt)
+    return endpoints
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    random.seed(1)
+    level = {}
+    for i in range(rooms):
+        level[i] = [synthetic_room(n, (30 * (i % 50), 30 * (i // 50)), gap=(i % 100 == 0))]
+
+    run(level, rooms, n, "ordered segments")
+
+    # boundaries collected from several sources are not chained end to end,
+    # that is where the linear scan degrades to O(n^2)
+    for loops in level.values():
+        random.shuffle(loops[0])
+    run(level, rooms, n, "shuffled segments")
+
+    # Revit boundaries usually share exact endpoints, those are found in the grid's exact lookup
+    exact = {}
+    for i in range(rooms):
+        exact[i] = [synthetic_room(n, (30 * (i % 50), 30 * (i // 50)), jitter=0.0, gap=(i % 100 == 0))]
+        random.shuffle(exact[i][0])
+    run(exact, rooms, n, "shuffled segments, exact endpoints")
+
+
+def run(level, rooms, n, label):
+    start = timer()
+    linear = {}
+    for key, loops in level.items():
+        ends = linear_open_ends(loops[0])
+        if ends:
+            linear[key] = ends
+    t_linear = timer() - start
+
+    start = timer()
+    report = spatial.open_ends_report(level)
+    t_grid = timer() - start
+
+    assert sorted(report.keys()) == sorted(linear.keys())
+    print("{} rooms x {} segments, {}, {} with open ends".format(rooms, n, label, len(report)))
+    print("  linear scan: {:.3f}s".format(t_linear))
+    print("  open_ends:   {:.3f}s".format(t_grid))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Throughput of the pyHP.poly kernel per 10k polygons
+
+Runs under CPython or IronPython, no Revit required:
+    python benchmarks/poly.py [polygons] [vertices]
+"""
+
+import math
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import poly
+
+
+def synthetic_polygon(n, origin):
+    # star-shaped polygon with n vertices around origin
+    angles = sorted(random.uniform(0, 2 * math.pi) for i in range(n))
+    return poly.to_xy([(origin[0] + random.uniform(3, 6) * math.cos(a), origin[1] + random.uniform(3, 6) * math.sin(a))
+                       for a in angles])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    random.seed(1)
+    polygons = [synthetic_polygon(n, (15 * (i % 100), 15 * (i // 100))) for i in range(count)]
+    probes = [poly.centroid(xy) for xy in polygons]
+
+    operations = [
+        ("area", lambda: [poly.area(xy) for xy in polygons]),
+        ("winding", lambda: [poly.winding(xy) for xy in polygons]),
+        ("centroid", lambda: [poly.centroid(xy) for xy in polygons]),
+        ("bounding box", lambda: [poly.bounding_box(xy) for xy in polygons]),
+        ("perimeter", lambda: [poly.perimeter(xy) for xy in polygons]),
+        ("point in polygon", lambda: [poly.contains(xy, p[0], p[1]) for xy, p in zip(polygons, probes)]),
+        ("offset", lambda: [poly.offset(xy, 0.5) for xy in polygons]),
+        ("min area rectangle", lambda: [poly.min_area_rectangle(poly.to_points(xy)) for xy in polygons]),
+    ]
+    print("{} polygons x {} vertices".format(count, n))
+    for name, run in operations:
+        start = timer()
+        run()
+        elapsed = timer() - start
+        print("{:<20} {:.3f}s per 10k polygons".format(name, elapsed * 10000.0 / count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark room rotation angles: previous trial rotations vs. closed-form orientation
+
+The previous geo.room_rotation_angle is transcribed with plain math in place of
+XYZ.AngleTo and Transform.CreateRotation, so it runs without Revit:
+    python benchmarks/rotation.py [rooms]
+"""
+
+import math
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import poly
+
+
+def rotated_rectangle(w, h, angle, origin=(0.0, 0.0)):
+    c, s = math.cos(angle), math.sin(angle)
+    corners = [(0, 0), (w, 0), (w, h), (0, h)]
+    pts = [(origin[0] + x * c - y * s, origin[1] + x * s + y * c, 0.0) for x, y in corners]
+    return [(pts[i], pts[(i + 1) % 4]) for i in range(4)]
+
+
+def angle_to(a, b):
+    dot = a[0] * b[0] + a[1] * b[1]
+    norm = math.hypot(a[0], a[1]) * math.hypot(b[0], b[1])
+    return math.acos(max(-1.0, min(1.0, dot / norm)))
+
+
+def rotate_z(v, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return (v[0] * c - v[1] * s, v[0] * s + v[1] * c)
+
+
+def trial_rotation_angle(segments):
+    # the previous algorithm: angle of the longest boundary to Y, corrected by trial rotations
+    p, q = max(segments, key=lambda seg: math.hypot(seg[1][0] - seg[0][0], seg[1][1] - seg[0][1]))
+    v = (q[0] - p[0], q[1] - p[1])
+    y_dir = (0.0, 1.0)
+    angle = angle_to(v, y_dir)
+    must_be_zero = math.degrees(angle_to(rotate_z(v, -angle), y_dir))
+    if round(must_be_zero, 0) != math.radians(0):
+        angle = -angle
+        must_be_zero2 = math.degrees(angle_to(rotate_z(v, -angle), y_dir))
+        if round(must_be_zero2, 0) != math.radians(0):
+            angle = math.radians(90) - angle
+    while abs(angle) > math.radians(90):
+        if angle > math.radians(0):
+            angle = angle - math.radians(90)
+        elif angle < math.radians(0):
+            angle = angle + math.radians(90)
+    return angle
+
+
+def misalignment(found, expected):
+    # angular error modulo 90 degrees
+    return abs(poly.fold_quarter(found - expected))
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    random.seed(1)
+    angles = [random.uniform(-math.pi, math.pi) for i in range(rooms)]
+    data = [rotated_rectangle(random.uniform(2, 12), random.uniform(2, 12), a) for a in angles]
+
+    start = timer()
+    trial = [trial_rotation_angle(segments) for segments in data]
+    t_trial = timer() - start
+
+    start = timer()
+    closed = poly.orientations(data)
+    t_closed = timer() - start
+
+    err_trial = max(misalignment(a, e) for a, e in zip(trial, angles))
+    err_closed = max(misalignment(a, e) for a, e in zip(closed, angles))
+    print("{} rotated rectangles".format(rooms))
+    print("trial rotations: {:.3f}s, max misalignment {:.4f} deg".format(t_trial, math.degrees(err_trial)))
+    print("closed form:     {:.3f}s, max misalignment {:.4f} deg".format(t_closed, math.degrees(err_closed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark unit stacking detection: comparing every pair of outlines vs. poly.OutlineIndex
+
+Runs under CPython or IronPython, no Revit required:
+    python benchmarks/stacking.py [storeys] [units per storey]
+"""
+
+import math
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import poly
+
+
+def unit_types(count):
+    # L-shaped and rectangular layouts of different sizes
+    types = []
+    for i in range(count):
+        w, h = random.uniform(20, 40), random.uniform(20, 30)
+        if i % 2:
+            types.append([(0, 0), (w, 0), (w, h), (0, h)])
+        else:
+            types.append([(0, 0), (w, 0), (w, h / 2), (w / 2, h / 2), (w / 2, h), (0, h)])
+    return types
+
+
+def tower(storeys, units, types, jitter=0.002):
+    # the same floor plate on every storey, units placed by type with small drawing errors
+    plate = [(random.randrange(len(types)), (50 * i, 0)) for i in range(units)]
+    outlines = []
+    for level in range(storeys):
+        for n, (t, (x, y)) in enumerate(plate):
+            pts = [(x + px + random.uniform(-jitter, jitter), y + py + random.uniform(-jitter, jitter))
+                   for px, py in types[t]]
+            outlines.append(((level, n), t, poly.to_xy(pts)))
+    return outlines
+
+
+def pairwise(outlines, tol):
+    # the direct approach: compare each outline with the earlier ones until one matches
+    seen = []
+    group_of = []
+    groups = []
+    for key, t, xy in outlines:
+        pts = poly.normalized_outline(xy, tol)[0]
+        for other, group in zip(seen, group_of):
+            if poly._same_outline(other, pts, tol):
+                break
+        else:
+            group = len(groups)
+            groups.append([])
+        groups[group].append(key)
+        seen.append(pts)
+        group_of.append(group)
+    return groups
+
+
+def main():
+    storeys = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    units = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    random.seed(1)
+    run(tower(storeys, units, unit_types(60)), storeys, units, "60 layout types")
+    # a tower whose every floor plate differs, most outlines are unique
+    outlines = []
+    for level in range(storeys):
+        outlines.extend(((level, key[1]), t, xy) for key, t, xy in tower(1, units, unit_types(units)))
+    run(outlines, storeys, units, "unique floor plates")
+
+
+def run(outlines, storeys, units, label, tol=0.01):
+    start = timer()
+    slow = pairwise(outlines, tol)
+    t_pairwise = timer() - start
+
+    start = timer()
+    index = poly.OutlineIndex(tol)
+    for key, t, xy in outlines:
+        index.add(key, xy)
+    groups = index.groups()
+    stacks = index.stacks()
+    t_index = timer() - start
+
+    assert sorted(map(sorted, slow)) == sorted(map(sorted, groups))
+    print("{} storeys x {} units, {}: {} layouts found, {} stacks".format(storeys, units, label, len(groups), len(stacks)))
+    print("compare with earlier ones: {:.3f}s".format(t_pairwise))
+    print("outline index:             {:.3f}s".format(t_index))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark merging rooms into flat outlines with poly.merge_outlines
+
+Runs under CPython or IronPython, no Revit required:
+    python benchmarks/union.py [flats] [rooms per flat]
+"""
+
+import math
+import os
+import random
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import poly
+
+
+WALL = 0.4
+
+
+def rectangle(x0, y0, x1, y1):
+    return [poly.to_xy([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])]
+
+
+def synthetic_flat(rooms, origin):
+    # a row of rooms over a corridor-wide room, all separated by internal walls
+    # rooms are rotated with the flat, so most edges are not axis aligned
+    x, y = origin
+    widths = [random.uniform(8, 14) for i in range(rooms - 1)]
+    depth = random.uniform(12, 16)
+    polygons = []
+    left = 0.0
+    for w in widths:
+        polygons.append(rectangle(left, 0.0, left + w, depth))
+        left += w + WALL
+    length = left - WALL
+    polygons.append(rectangle(0.0, depth + WALL, length, depth + WALL + 5.0))
+    angle = random.uniform(0, math.pi)
+    c, s = math.cos(angle), math.sin(angle)
+    moved = []
+    for loops in polygons:
+        pts = [(x + px * c - py * s, y + px * s + py * c) for px, py in poly.to_points(loops[0])]
+        moved.append([poly.to_xy(pts)])
+    return moved, length * (depth + WALL + 5.0)
+
+
+def main():
+    flats = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    random.seed(1)
+    data = [synthetic_flat(rooms, (120 * (i % 30), 120 * (i // 30))) for i in range(flats)]
+
+    start = timer()
+    merged = [poly.merge_outlines(polygons, gap=1.5 * WALL) for polygons, expected in data]
+    elapsed = timer() - start
+
+    single = len([m for m in merged if len(m) == 1 and len(m[0]) == 1])
+    error = max(abs(poly.area(m[0][0]) - expected) / expected for m, (polygons, expected) in zip(merged, data))
+    print("{} flats x {} rooms".format(flats, rooms))
+    print("merged in {:.3f}s, {} single outlines, max area error {:.4%}".format(elapsed, single, error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Room adjacency through shared boundary elements, no Revit API required
+
+Rooms are linked room - element - room: two rooms are neighbours when the same element
+(a wall, a room separation line) bounds both and their boundary segments along it face each other.
+Boundaries run with the room on their left, as Revit returns them, so rooms on opposite sides of
+an element have segments running in opposite directions along it."""
+
+import math
+
+
+def _axis(segments):
+    # origin and unit direction of the first segment with a length, None for point-like input
+    for start, end in segments:
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        length = math.hypot(dx, dy)
+        if length:
+            return start, (dx / length, dy / length)
+    return None
+
+
+def _merge(intervals):
+    # union of (lo, hi) intervals as a sorted list of disjoint intervals
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1]:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def _overlap(a, b):
+    # total length in common between two sorted lists of disjoint intervals
+    total = 0.0
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo = max(a[i][0], b[j][0])
+        hi = min(a[i][1], b[j][1])
+        if hi > lo:
+            total += hi - lo
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return total
+
+
+def _vertical_overlap(a, b, tol):
+    # z ranges (bottom, top) overlap by more than tol; a flat range (a boundary elevation) only needs to touch
+    lo = max(a[0], b[0])
+    hi = min(a[1], b[1])
+    if a[0] == a[1] or b[0] == b[1]:
+        return hi >= lo - tol
+    return hi - lo > tol
+
+
+class AdjacencyGraph:
+    '''Rooms linked through the elements that bound them, built in one pass
+    boundaries maps a room key to its boundary segments as (element key, start, end), points (x, y, ...)
+    Shared lengths are the overlap of both rooms' segments projected on the element's direction,
+    counted only between segments that run in opposite directions with the rooms facing each other,
+    so rooms on the same side of a wall or only touching at a corner of a long wall are not neighbours.
+    heights optionally maps a room key to its (bottom, top) z range; without it rooms are compared by
+    the z of their boundary points where given. Rooms whose ranges do not overlap are never linked'''
+    def __init__(self, boundaries, tol=0.003, heights=None):
+        self.tol = tol
+        self.elements = {}
+        self.rooms = {}
+        self.shared = {}
+        self.links = {}
+        self.heights = {}
+        by_element = {}
+        for room, segments in boundaries.items():
+            self.shared[room] = {}
+            self.links[room] = {}
+            self.elements[room] = set()
+            z = [pt[2] for start, end in ((s[1], s[2]) for s in segments) for pt in (start, end) if len(pt) > 2]
+            if heights is not None and room in heights:
+                self.heights[room] = tuple(heights[room])
+            elif z:
+                self.heights[room] = (min(z), max(z))
+            for element, start, end in segments:
+                if element is None:
+                    continue
+                self.elements[room].add(element)
+                by_element.setdefault(element, {}).setdefault(room, []).append((start, end))
+        for element, segments_by_room in by_element.items():
+            self.rooms[element] = set(segments_by_room)
+            if len(segments_by_room) > 1:
+                self._link(element, segments_by_room)
+
+    def _stacked(self, a, b):
+        # True if two rooms are at heights that do not overlap
+        if a not in self.heights or b not in self.heights:
+            return False
+        return not _vertical_overlap(self.heights[a], self.heights[b], self.tol)
+
+    def _link(self, element, segments_by_room):
+        # project each room's segments on the element axis, split by the direction they run along it,
+        # and link rooms whose opposite-running intervals overlap and face each other
+        axis = _axis([seg for segments in segments_by_room.values() for seg in segments])
+        if axis is None:
+            return
+        (ox, oy), (ux, uy) = axis[0][:2], axis[1]
+        sides = {}
+        for room, segments in segments_by_room.items():
+            spans = {1: [], -1: []}
+            offsets = {1: [], -1: []}
+            for start, end in segments:
+                a = (start[0] - ox) * ux + (start[1] - oy) * uy
+                b = (end[0] - ox) * ux + (end[1] - oy) * uy
+                if abs(b - a) <= self.tol:
+                    continue
+                direction = 1 if b > a else -1
+                spans[direction].append((min(a, b), max(a, b)))
+                # perpendicular offset from the axis, positive to the left of +u
+                for x, y in (start[:2], end[:2]):
+                    offsets[direction].append((y - oy) * ux - (x - ox) * uy)
+            sides[room] = dict((d, (_merge(spans[d]), sum(offsets[d]) / len(offsets[d])))
+                               for d in (1, -1) if spans[d])
+        rooms = list(sides)
+        for i in range(len(rooms)):
+            for j in range(i + 1, len(rooms)):
+                a, b = rooms[i], rooms[j]
+                if self._stacked(a, b):
+                    continue
+                length = self._facing(sides[a], sides[b]) + self._facing(sides[b], sides[a])
+                if length <= self.tol:
+                    continue
+                self.shared[a][b] = self.shared[a].get(b, 0.0) + length
+                self.shared[b][a] = self.shared[a][b]
+                self.links[a].setdefault(b, set()).add(element)
+                self.links[b].setdefault(a, set()).add(element)
+
+    def _facing(self, forward, backward):
+        # overlap of one room running +u with another running -u along the element
+        # the +u room lies on the positive side of its segments and the -u room on the negative side,
+        # so the element is between them when the -u segments are not on the positive side of the +u ones
+        if 1 not in forward or -1 not in backward:
+            return 0.0
+        intervals_f, offset_f = forward[1]
+        intervals_b, offset_b = backward[-1]
+        if offset_b > offset_f + self.tol:
+            return 0.0
+        return _overlap(intervals_f, intervals_b)
+
+    def neighbours(self, room):
+        # rooms sharing a boundary element with room
+        return list(self.shared.get(room, ()))
+
+    def shared_length(self, a, b):
+        # length of the boundary shared by two rooms, 0.0 if they are not neighbours
+        return self.shared.get(a, {}).get(b, 0.0)
+
+    def shared_elements(self, a, b):
+        # keys of the elements separating two rooms
+        return set(self.links.get(a, {}).get(b, ()))
+
+    def rooms_of(self, element):
+        # rooms bounded by an element
+        return set(self.rooms.get(element, ()))
+
+    def components(self, min_length=0.0, element_filter=None):
+        # groups of rooms connected through shared boundaries, largest first
+        # min_length: ignore links shorter than this; element_filter(element key): only follow links
+        # through elements for which it is true, e.g. to group rooms into flats across internal walls only
+        seen = set()
+        groups = []
+        for start in self.shared:
+            if start in seen:
+                continue
+            seen.add(start)
+            group = [start]
+            stack = [start]
+            while stack:
+                room = stack.pop()
+                for other, length in self.shared[room].items():
+                    if other in seen or length < min_length:
+                        continue
+                    if element_filter and not any(element_filter(e) for e in self.links[room][other]):
+                        continue
+                    seen.add(other)
+                    group.append(other)
+                    stack.append(other)
+            groups.append(group)
+        groups.sort(key=len, reverse=True)
+        return groups
+
+    def __len__(self):
+        return len(self.shared)
+
+    def __contains__(self, room):
+        return room in self.shared
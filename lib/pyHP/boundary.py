@@ -0,0 +1,168 @@
+"""Room boundaries as lightweight segment records, cached per run"""
+
+from array import array
+from collections import namedtuple
+from pyrevit import DB
+from pyHP import cache, changes
+
+
+# start, end and mid are (x, y, z) tuples; mid is the curve's midpoint, arcs are rebuilt through it
+Segment = namedtuple("Segment", ["start", "end", "mid", "is_arc"])
+
+
+def xyz_tuple(pt):
+    return (pt.X, pt.Y, pt.Z)
+
+
+def midpoint(a, b):
+    return (0.5 * (a[0] + b[0]), 0.5 * (a[1] + b[1]), 0.5 * (a[2] + b[2]))
+
+
+def curve_to_segments(curve):
+    # convert a boundary curve into Segment records
+    if isinstance(curve, DB.Line):
+        start = xyz_tuple(curve.GetEndPoint(0))
+        end = xyz_tuple(curve.GetEndPoint(1))
+        return [Segment(start, end, midpoint(start, end), False)]
+    if isinstance(curve, DB.Arc):
+        return [Segment(xyz_tuple(curve.GetEndPoint(0)),
+                        xyz_tuple(curve.GetEndPoint(1)),
+                        xyz_tuple(curve.Evaluate(0.5, True)),
+                        True)]
+    # other curve types (ellipses, splines) are kept as their tessellation
+    pts = [xyz_tuple(p) for p in curve.Tessellate()]
+    return [Segment(a, b, midpoint(a, b), False) for a, b in zip(pts[:-1], pts[1:])]
+
+
+def segment_to_curve(seg):
+    # rebuild a DB.Line or DB.Arc from a Segment record
+    if seg.is_arc:
+        return DB.Arc.Create(DB.XYZ(*seg.start), DB.XYZ(*seg.end), DB.XYZ(*seg.mid))
+    return DB.Line.CreateBound(DB.XYZ(*seg.start), DB.XYZ(*seg.end))
+
+
+def chord_length(seg):
+    s, e = seg.start, seg.end
+    return ((e[0] - s[0]) ** 2 + (e[1] - s[1]) ** 2 + (e[2] - s[2]) ** 2) ** 0.5
+
+
+def transform_rows(transform):
+    # a Transform as 3 rows of a 3x4 matrix (rotation | translation) of plain floats
+    o, bx, by, bz = transform.Origin, transform.BasisX, transform.BasisY, transform.BasisZ
+    return ((bx.X, by.X, bz.X, o.X),
+            (bx.Y, by.Y, bz.Y, o.Y),
+            (bx.Z, by.Z, bz.Z, o.Z))
+
+
+def apply_rows(rows, coords):
+    # apply a 3x4 matrix to a block of (x, y, z) coordinates
+    (a, b, c, d), (e, f, g, h), (i, j, k, l) = rows
+    return [(a * x + b * y + c * z + d, e * x + f * y + g * z + h, i * x + j * y + k * z + l)
+            for x, y, z in coords]
+
+
+def transform_loops(loops, transform):
+    # apply a Transform (or its 3x4 rows) to loops of Segment records
+    # all points are packed into one flat float array and transformed in a single pass
+    if isinstance(transform, tuple):
+        rows = transform
+    else:
+        rows = transform_rows(transform)
+    (a, b, c, d), (e, f, g, h), (i, j, k, l) = rows
+    flat = array('d')
+    for loop in loops:
+        for seg in loop:
+            flat.extend(seg.start)
+            flat.extend(seg.end)
+            flat.extend(seg.mid)
+    for n in range(0, len(flat), 3):
+        x, y, z = flat[n], flat[n + 1], flat[n + 2]
+        flat[n] = a * x + b * y + c * z + d
+        flat[n + 1] = e * x + f * y + g * z + h
+        flat[n + 2] = i * x + j * y + k * z + l
+    moved = []
+    n = 0
+    for loop in loops:
+        moved_loop = []
+        for seg in loop:
+            moved_loop.append(Segment((flat[n], flat[n + 1], flat[n + 2]),
+                                      (flat[n + 3], flat[n + 4], flat[n + 5]),
+                                      (flat[n + 6], flat[n + 7], flat[n + 8]),
+                                      seg.is_arc))
+            n += 9
+        moved.append(tuple(moved_loop))
+    return tuple(moved)
+
+
+def options_key(options):
+    return (str(options.SpatialElementBoundaryLocation), bool(options.StoreFreeBoundaryFaces))
+
+
+def extract_loops(room, options):
+    # read the room boundary once and return it as a tuple of loops of Segment records
+    loops = []
+    for seg_loop in room.GetBoundarySegments(options):
+        loop = []
+        for s in seg_loop:
+            loop.extend(curve_to_segments(s.GetCurve()))
+        loops.append(tuple(loop))
+    return tuple(loops)
+
+
+def element_key(segment):
+    # key of the element behind a BoundarySegment: its id, or (link instance id, id) for linked elements
+    if segment.ElementId == DB.ElementId.InvalidElementId:
+        return None
+    if segment.LinkElementId != DB.ElementId.InvalidElementId:
+        return (segment.ElementId.IntegerValue, segment.LinkElementId.IntegerValue)
+    return segment.ElementId.IntegerValue
+
+
+def extract_elements(room, options=None):
+    # (element key, start, end) of every boundary segment of a room, points as (x, y, z) tuples
+    if options is None:
+        options = DB.SpatialElementBoundaryOptions()
+    records = []
+    for seg_loop in room.GetBoundarySegments(options):
+        for s in seg_loop:
+            curve = s.GetCurve()
+            records.append((element_key(s), xyz_tuple(curve.GetEndPoint(0)), xyz_tuple(curve.GetEndPoint(1))))
+    return records
+
+
+def room_key(room, options):
+    # element ids repeat across open documents, the document is part of the key
+    return changes.doc_key(room.Document), room.Id.IntegerValue, options_key(options)
+
+
+class BoundaryCache(cache.Cache):
+    '''Room boundary loops keyed by document, room id and boundary options
+    All geo helpers read boundaries through it, so chained helpers extract each room once'''
+    def loops(self, room, options=None):
+        if options is None:
+            options = DB.SpatialElementBoundaryOptions()
+        return self.get(room_key(room, options), lambda: extract_loops(room, options))
+
+    def replace(self, room, loops, options=None):
+        # store repaired loops for a room, later reads get them instead of the model's boundary
+        if options is None:
+            options = DB.SpatialElementBoundaryOptions()
+        self.put(room_key(room, options), tuple(tuple(loop) for loop in loops))
+
+    def invalidate_room(self, room):
+        # drop a room's boundaries for all boundary options, e.g. after its bounding walls moved
+        # a room element limits this to its document, an ElementId or int drops the id in every document
+        if isinstance(room, DB.ElementId):
+            room_id, doc = room.IntegerValue, None
+        elif isinstance(room, int):
+            room_id, doc = room, None
+        else:
+            room_id, doc = room.Id.IntegerValue, changes.doc_key(room.Document)
+        self.invalidate_where(lambda key: key[1] == room_id and doc in (None, key[0]))
+
+
+boundary_cache = BoundaryCache("room boundaries")
+
+
+def get_loops(room, options=None):
+    return boundary_cache.loops(room, options)
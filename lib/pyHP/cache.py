@@ -0,0 +1,122 @@
+"""Small in-memory caches with hit/miss statistics, no Revit API required"""
+
+from collections import OrderedDict
+from timeit import default_timer as timer
+
+
+class Cache:
+    '''Dictionary cache that computes missing values through a loader
+    Keeps hit/miss counters and the time spent in the loader, so the savings of a run can be reported'''
+    def __init__(self, name="cache"):
+        self.name = name
+        self.store = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    def get(self, key, loader):
+        # return the cached value for key, calling loader() on a miss
+        try:
+            value = self.store[key]
+        except KeyError:
+            self.misses += 1
+            start = timer()
+            value = loader()
+            self.load_time += timer() - start
+            self.store[key] = value
+            return value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        # store a value computed outside of get(), e.g. by a batch loader
+        self.store[key] = value
+
+    def invalidate(self, key=None):
+        # drop one key, or everything when no key is given
+        if key is None:
+            self.store.clear()
+        else:
+            self.store.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        # drop all keys for which predicate(key) is true
+        for key in [k for k in self.store if predicate(k)]:
+            del self.store[key]
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        if not total:
+            return 0.0
+        return float(self.hits) / total
+
+    def stats(self):
+        return {"name": self.name,
+                "size": len(self.store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate(),
+                "load_time": self.load_time}
+
+    def report(self):
+        # one line summary for script output
+        return "{name}: {size} entries, {hits} hits, {misses} misses ({hit_rate:.0%}), " \
+               "{load_time:.2f}s spent loading".format(**self.stats())
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, key):
+        return key in self.store
+
+
+class LRUCache(Cache):
+    '''Cache bounded to maxsize entries, the least recently used entry is evicted first
+    Values are stored with a change stamp; a value stored under another stamp is stale and is recomputed'''
+    def __init__(self, name="cache", maxsize=256):
+        Cache.__init__(self, name)
+        self.maxsize = maxsize
+        self.store = OrderedDict()
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key, loader, stamp=None):
+        entry = self.store.pop(key, None)
+        if entry is not None:
+            if entry[0] == stamp:
+                self.hits += 1
+                self.store[key] = entry
+                return entry[1]
+            self.stale += 1
+        self.misses += 1
+        start = timer()
+        value = loader()
+        self.load_time += timer() - start
+        self.put(key, value, stamp)
+        return value
+
+    def put(self, key, value, stamp=None):
+        self.store.pop(key, None)
+        self.store[key] = (stamp, value)
+        while len(self.store) > self.maxsize:
+            self.store.popitem(last=False)
+            self.evictions += 1
+
+    def reset_stats(self):
+        Cache.reset_stats(self)
+        self.stale = 0
+        self.evictions = 0
+
+    def stats(self):
+        stats = Cache.stats(self)
+        stats["stale"] = self.stale
+        stats["evictions"] = self.evictions
+        return stats
+
+    def report(self):
+        return Cache.report(self) + ", {stale} stale, {evictions} evicted".format(**self.stats())
@@ -0,0 +1,175 @@
+"""Document change tracking for the pyHP caches
+
+The per document objects (document index, parameter catalog, family registry, id/name maps) live for
+one command run. Tracking is opt-in: start_tracking() subscribes DocumentChanged and DocumentClosing
+and keeps the objects in the session, refreshed from the changes. Event handlers outlive the engine
+that bound them, so start_tracking() must only be called from a persistent engine, e.g. a startup
+hook or a script with __persistentengine__ = True."""
+
+from pyrevit import HOST_APP, DB
+from pyrevit.coreutils import envvars
+
+
+TRACKER_VAR = "PYHP_CHANGE_TRACKER"
+
+
+class DocumentChange:
+    '''One DocumentChanged event, shared by every pyHP object of the document
+    Only element ids are read, filtered by Revit; elements are never resolved here'''
+    def __init__(self, args, doc, key):
+        self.args = args
+        self.doc = doc
+        self.key = key
+        self.id_sets = {}
+
+    def _ids(self, kind, element_filter=None):
+        # id values of the added, modified or deleted elements, the first two optionally filtered
+        cache_key = (kind, element_filter)
+        if cache_key not in self.id_sets:
+            if kind == "deleted":
+                ids = self.args.GetDeletedElementIds()
+            elif element_filter is None:
+                ids = self.args.GetAddedElementIds() if kind == "added" else self.args.GetModifiedElementIds()
+            elif kind == "added":
+                ids = self.args.GetAddedElementIds(element_filter)
+            else:
+                ids = self.args.GetModifiedElementIds(element_filter)
+            self.id_sets[cache_key] = set(element_id.IntegerValue for element_id in ids)
+        return self.id_sets[cache_key]
+
+    def deleted_ids(self):
+        # id values of the deleted elements
+        return self._ids("deleted")
+
+    def added_ids(self, element_filter=None):
+        # id values of the added elements passing element_filter (a DB.ElementFilter), all when None
+        return self._ids("added", element_filter)
+
+    def modified_ids(self, element_filter=None):
+        return self._ids("modified", element_filter)
+
+    def changed_ids(self, element_filter=None):
+        # id values of the added and modified elements passing element_filter
+        return self.added_ids(element_filter) | self.modified_ids(element_filter)
+
+
+class ChangeTracker:
+    '''Dispatches DocumentChanged to the pyHP objects kept per document, and counts changes for the elements caches stamp
+    Caches use the counters as change stamps where Revit has no element versions; an element is only
+    counted once a cache has asked for its stamp, and its counter is dropped when its document closes.
+    Events of documents no pyHP object or stamp refers to return right away'''
+    def __init__(self):
+        self.versions = {}
+        self.documents = {}
+        self.started = False
+
+    def start(self, app=None):
+        # subscribe to DocumentChanged and DocumentClosing once per session, see start_tracking
+        if self.started:
+            return
+        if app is None:
+            app = HOST_APP.app
+        app.DocumentChanged += self.on_changed
+        app.DocumentClosing += self.on_closing
+        self.started = True
+        envvars.set_pyrevit_env_var(TRACKER_VAR, self)
+
+    def _watched(self, key):
+        if key in self.versions:
+            return True
+        return any(key in objects for objects in self.documents.values())
+
+    def on_changed(self, sender, args):
+        doc = args.GetDocument()
+        key = doc_key(doc)
+        if not self._watched(key):
+            return
+        change = DocumentChange(args, doc, key)
+        versions = self.versions.get(key)
+        if versions:
+            for id_value in change.modified_ids() | change.deleted_ids():
+                if id_value in versions:
+                    versions[id_value] += 1
+        for objects in list(self.documents.values()):
+            obj = objects.get(key)
+            if obj is not None and obj.doc.IsValidObject:
+                obj.on_changed(change)
+
+    def on_closing(self, sender, args):
+        key = doc_key(args.Document)
+        self.versions.pop(key, None)
+        for objects in self.documents.values():
+            objects.pop(key, None)
+
+    def register(self, name, objects):
+        # objects: {document key: object with .doc and .on_changed(change)}, dispatched to by document
+        self.documents[name] = objects
+
+    def stamp(self, element):
+        # number of changes to element since a cache first asked for its stamp
+        versions = self.versions.setdefault(doc_key(element.Document), {})
+        return versions.setdefault(element.Id.IntegerValue, 0)
+
+
+def session_object(name, factory):
+    # an object kept in the pyRevit session, so it survives between tool runs
+    obj = envvars.get_pyrevit_env_var(name)
+    if obj is None:
+        obj = factory()
+        envvars.set_pyrevit_env_var(name, obj)
+    return obj
+
+
+# the session's tracker once tracking was started, otherwise an idle one for this run
+tracker = envvars.get_pyrevit_env_var(TRACKER_VAR) or ChangeTracker()
+
+
+def start_tracking(app=None):
+    # opt in to change tracking for the rest of the session; only call from a persistent engine
+    tracker.start(app)
+
+
+def tracking():
+    return tracker.started
+
+
+def doc_key(doc):
+    # identifies a document within the session
+    return doc.PathName or doc.Title
+
+
+def versioned_elements():
+    # True if Revit stamps element versions itself (VersionGuid, 2021+)
+    return HOST_APP.is_newer_than(2020)
+
+
+def element_stamp(element):
+    # change stamp of an element: Revit's VersionGuid where available (2021+), otherwise
+    # the number of DocumentChanged events that touched it since it was first stamped while tracking,
+    # None without tracking (only valid for the current run)
+    version = getattr(element, "VersionGuid", None)
+    if version is not None:
+        return str(version)
+    if tracker.started:
+        return tracker.stamp(element)
+    return None
+
+
+def per_document(name, cls):
+    # getter of one cls(doc) per open document
+    # while tracking, the objects are kept in the session under name, receive on_changed(change) for
+    # their own document only and are dropped when it closes; otherwise they live for this run
+    if tracker.started:
+        objects = session_object(name, dict)
+        tracker.register(name, objects)
+    else:
+        objects = {}
+
+    def get(doc):
+        key = doc_key(doc)
+        obj = objects.get(key)
+        if obj is None or not obj.doc.IsValidObject:
+            obj = cls(doc)
+            objects[key] = obj
+        return obj
+    return get
@@ -1,100 +1,584 @@
 # -*- coding: utf-8 -*-
 
+import clr
 from pyrevit import revit, DB, script, forms, HOST_APP, coreutils
+from pyrevit.framework import List
 from pyrevit.revit.db import query
-
-
-def get_sheet(some_number):
-    sheet_nr_filter = query.get_biparam_stringequals_filter({DB.BuiltInParameter.SHEET_NUMBER: str(some_number)})
-    found_sheet = DB.FilteredElementCollector(revit.doc) \
-        .OfCategory(DB.BuiltInCategory.OST_Sheets) \
-        .WherePasses(sheet_nr_filter) \
-        .WhereElementIsNotElementType().ToElements()
-
-    return found_sheet
-
-
-def get_view(some_name):
-    view_name_filter = query.get_biparam_stringequals_filter({DB.BuiltInParameter.VIEW_NAME: some_name})
-    found_view = DB.FilteredElementCollector(revit.doc) \
-        .OfCategory(DB.BuiltInCategory.OST_Views) \
-        .WherePasses(view_name_filter) \
-        .WhereElementIsNotElementType().ToElements()
-
-    return found_view
-
-
-def get_schedule(some_name):
-    sch_name_filter = query.get_biparam_stringequals_filter({DB.BuiltInParameter.VIEW_NAME: some_name})
-    found_sch = DB.FilteredElementCollector(revit.doc) \
-        .OfCategory(DB.BuiltInCategory.OST_Schedules) \
-        .WherePasses(sch_name_filter) \
-        .WhereElementIsNotElementType().ToElements()
-
-    return found_sch
-
-
-def get_fam_types(family_name):
-    fam_bip_id = DB.ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM)
-    fam_bip_provider = DB.ParameterValueProvider(fam_bip_id)
-    fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name, True)
-    fam_filter = DB.ElementParameterFilter(fam_filter_rule)
-
-    collector = DB.FilteredElementCollector(revit.doc) \
-        .WherePasses(fam_filter) \
-        .WhereElementIsElementType()
-
-    return collector
-
-
-def get_fam_any_type(family_name):
-    fam_bip_id = DB.ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM)
-    fam_bip_provider = DB.ParameterValueProvider(fam_bip_id)
-    fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name, True)
-    fam_filter = DB.ElementParameterFilter(fam_filter_rule)
-
-    collector = DB.FilteredElementCollector(revit.doc) \
-        .WherePasses(fam_filter) \
-        .WhereElementIsElementType() \
-        .FirstElement()
-
-    return collector
+from pyHP import changes
+
+
+# DocumentChanged filters: the handlers read the ids Revit filtered and leave resolving to the next lookup
+VIEW_FILTER = DB.ElementClassFilter(DB.View)
+ELEMENT_TYPE_FILTER = DB.ElementIsElementTypeFilter()
+PARAMETER_OR_FAMILY_FILTER = DB.LogicalOrFilter(DB.ElementClassFilter(DB.ParameterElement),
+                                                DB.ElementClassFilter(DB.Family))
+
+
+class DocumentIndex:
+    '''Views, sheets, schedules and view templates of a document, walked once and served from dicts
+    Views and schedules are filed by name, sheets by number. Elements created or renamed by pyHP tools
+    are filed again through update(); other changes reach the index through DocumentChanged, as ids
+    refiled on the next lookup.
+    Until its transaction commits, an element filed through update() keeps its previous entries too,
+    and a lookup that hits it checks its name or number first (only that element, not every pending one),
+    so a rolled back rename or creation does not leave it under the wrong name'''
+    def __init__(self, doc):
+        self.doc = doc
+        self.built = False
+
+    def build(self):
+        # one collector over all views, sheets and schedules
+        self.tables = {"views": {}, "sheets": {}, "schedules": {}, "templates": {}}
+        self.filed = {}
+        self.pending = set()
+        self.stale = set()
+        self.built = True
+        for view in DB.FilteredElementCollector(self.doc).OfClass(DB.View):
+            self._file(view)
+
+    def _ensure(self):
+        if not self.built or not self.doc.IsValidObject:
+            self.build()
+        elif self.stale:
+            self._refile()
+
+    def _refile(self):
+        # file the views DocumentChanged reported as added or modified
+        for id_value in self.stale:
+            view = self.doc.GetElement(DB.ElementId(id_value))
+            if view is None:
+                self._unfile(id_value)
+            else:
+                self._file(view)
+        self.stale = set()
+
+    def _entries(self, element):
+        # (table, key) pairs an element is filed under
+        entries = []
+        if element.IsTemplate:
+            entries.append(("templates", element.Name))
+        category = element.Category
+        if category:
+            category_id = category.Id.IntegerValue
+            if category_id == int(DB.BuiltInCategory.OST_Views):
+                entries.append(("views", element.Name))
+            elif category_id == int(DB.BuiltInCategory.OST_Sheets):
+                entries.append(("sheets", element.SheetNumber))
+            elif category_id == int(DB.BuiltInCategory.OST_Schedules):
+                entries.append(("schedules", element.Name))
+        return entries
+
+    def _add(self, element, table, key):
+        found = self.tables[table].setdefault(key, [])
+        if not any(el.Id.IntegerValue == element.Id.IntegerValue for el in found):
+            found.append(element)
+
+    def _remove(self, id_value, table, key):
+        found = [el for el in self.tables[table].get(key, ()) if el.Id.IntegerValue != id_value]
+        if found:
+            self.tables[table][key] = found
+        else:
+            self.tables[table].pop(key, None)
+
+    def _file(self, element):
+        # file an element under its current name or number, dropping its previous entries
+        self._unfile(element.Id.IntegerValue)
+        entries = self._entries(element)
+        for table, key in entries:
+            self._add(element, table, key)
+        self.filed[element.Id.IntegerValue] = entries
+
+    def _unfile(self, id_value):
+        for table, key in self.filed.pop(id_value, ()):
+            self._remove(id_value, table, key)
+
+    def update(self, element):
+        # call after creating or renaming a view, sheet or schedule
+        # the previous entries stay until a lookup finds the element no longer matches them
+        if self.built:
+            id_value = element.Id.IntegerValue
+            entries = self.filed.get(id_value, [])
+            for table, key in self._entries(element):
+                if (table, key) not in entries:
+                    self._add(element, table, key)
+                    entries = entries + [(table, key)]
+            self.filed[id_value] = entries
+            self.pending.add(id_value)
+
+    def invalidate(self):
+        self.built = False
+
+    def on_changed(self, change):
+        # keep the index in step with the document: mark changed views for refiling, drop deleted ones
+        if not self.built:
+            return
+        # the transactions of pending updates are over, refile them on the next lookup:
+        # committed ones under their new names, rolled back ones as the model has them again
+        self.stale.update(self.pending)
+        self.pending = set()
+        deleted = change.deleted_ids()
+        for id_value in deleted:
+            self._unfile(id_value)
+        self.stale.difference_update(deleted)
+        self.stale.update(change.changed_ids(VIEW_FILTER))
+
+    def _lookup(self, table, key):
+        # elements filed under key; elements of a rolled back transaction are skipped, and pending
+        # elements are checked against their current name or number, only the ones this lookup hits
+        found = []
+        for el in list(self.tables[table].get(key, ())):
+            id_value = el.Id.IntegerValue
+            if not el.IsValidObject:
+                self._unfile(id_value)
+                self.pending.discard(id_value)
+            elif id_value in self.pending and (table, key) not in self._entries(el):
+                # renamed away since, or a rename that was rolled back; the entry stays for the other case
+                continue
+            else:
+                found.append(el)
+        return found
+
+    def _all(self, table):
+        return [el for key in list(self.tables[table]) for el in self._lookup(table, key)]
+
+    def _keys(self, table):
+        # names or numbers in use; keys held only by pending elements are checked
+        keys = set()
+        for key, found in list(self.tables[table].items()):
+            if any(el.Id.IntegerValue not in self.pending for el in found) or self._lookup(table, key):
+                keys.add(key)
+        return keys
+
+    def view(self, name):
+        # views (including templates) with the given name, as a list
+        self._ensure()
+        return self._lookup("views", name)
+
+    def sheet(self, number):
+        self._ensure()
+        return self._lookup("sheets", str(number))
+
+    def schedule(self, name):
+        self._ensure()
+        return self._lookup("schedules", name)
+
+    def template(self, name):
+        self._ensure()
+        return self._lookup("templates", name)
+
+    def all_views(self):
+        self._ensure()
+        return self._all("views")
+
+    def all_schedules(self):
+        self._ensure()
+        return self._all("schedules")
+
+    def all_templates(self):
+        self._ensure()
+        return self._all("templates")
+
+    def view_names(self):
+        self._ensure()
+        return self._keys("views")
+
+    def schedule_names(self):
+        self._ensure()
+        return self._keys("schedules")
+
+    def sheet_numbers(self):
+        self._ensure()
+        return self._keys("sheets")
+
+
+document_indexes = changes.per_document("PYHP_DOCUMENT_INDEXES", DocumentIndex)
+
+
+def document_index(doc=revit.doc):
+    # the DocumentIndex of a document, for this run or for the session while tracking changes
+    return document_indexes(doc)
+
+
+class ParameterInfo:
+    '''A parameter as the catalog knows it: definition, storage type, instance or type, shared GUID, read-only
+    storage_type is None for a bound parameter no element of the category carries yet'''
+    def __init__(self, definition, storage_type, is_instance, guid=None, read_only=False):
+        self.definition = definition
+        self.name = definition.Name
+        self.storage_type = storage_type
+        self.is_instance = is_instance
+        self.guid = guid
+        self.read_only = read_only
+        builtin = definition.BuiltInParameter
+        self.builtin = builtin if builtin != DB.BuiltInParameter.INVALID else None
+        self.varies_across_groups = getattr(definition, "VariesAcrossGroups", False)
+        # project and shared parameters bound to the category apply to all of it,
+        # the others only to the families they were found in
+        self.bound = False
+        self.families = set()
+
+    @property
+    def key(self):
+        # shared GUID, BuiltInParameter or name, whichever identifies the parameter
+        if self.guid:
+            return self.guid
+        if self.builtin is not None:
+            return self.builtin
+        return self.name
+
+
+def category_id(category):
+    # BuiltInCategory, Category, ElementId or int as an int
+    if isinstance(category, DB.Category):
+        return category.Id.IntegerValue
+    if isinstance(category, DB.ElementId):
+        return category.IntegerValue
+    return int(category)
+
+
+class ParameterCatalog:
+    '''Parameters of each category of a document, collected once and served to the UI pickers
+    Project and shared parameters come from the document's parameter bindings; built-in and family
+    parameters from one element type and one instance per family of the category.
+    Changes to parameters, bindings or loaded families drop the catalog, elements added to a category drop it'''
+    def __init__(self, doc):
+        self.doc = doc
+        self.invalidate()
+
+    def invalidate(self):
+        self.bindings = None
+        self.binding_count = None
+        self.parameter_ids = set()
+        self.categories = {}
+        self.sampled = {}
+
+    def _bindings(self):
+        # category id -> {(name, is_instance): ParameterInfo} of the bound project and shared parameters
+        if self.bindings is not None:
+            return self.bindings
+        self.bindings = {}
+        binding_map = self.doc.ParameterBindings
+        iterator = binding_map.ForwardIterator()
+        while iterator.MoveNext():
+            definition = iterator.Key
+            binding = iterator.Current
+            is_instance = isinstance(binding, DB.InstanceBinding)
+            parameter = self.doc.GetElement(definition.Id)
+            self.parameter_ids.add(definition.Id.IntegerValue)
+            guid = parameter.GuidValue if isinstance(parameter, DB.SharedParameterElement) else None
+            for category in binding.Categories:
+                info = ParameterInfo(definition, None, is_instance, guid)
+                info.bound = True
+                self.bindings.setdefault(category.Id.IntegerValue, {})[(info.name, is_instance)] = info
+        self.binding_count = binding_map.Size
+        return self.bindings
+
+    def _samples(self, cat_id):
+        # one element type and one instance per family of a category, with the type id -> family map
+        family_of = {}
+        types = {}
+        for element_type in DB.FilteredElementCollector(self.doc).OfCategoryId(DB.ElementId(cat_id)) \
+                .WhereElementIsElementType():
+            family_of[element_type.Id.IntegerValue] = element_type.FamilyName
+            types.setdefault(element_type.FamilyName, element_type)
+        instances = {}
+        for element in DB.FilteredElementCollector(self.doc).OfCategoryId(DB.ElementId(cat_id)) \
+                .WhereElementIsNotElementType():
+            instances.setdefault(family_of.get(element.GetTypeId().IntegerValue, ""), element)
+        return family_of, types, instances
+
+    def _build(self, cat_id):
+        entries = dict(self._bindings().get(cat_id, {}))
+        family_of, types, instances = self._samples(cat_id)
+        for is_instance, samples in ((False, types), (True, instances)):
+            for family, element in samples.items():
+                for p in element.Parameters:
+                    key = (p.Definition.Name, is_instance)
+                    info = entries.get(key)
+                    if info is None:
+                        info = ParameterInfo(p.Definition, p.StorageType.ToString(), is_instance,
+                                             p.GUID if p.IsShared else None, p.IsReadOnly)
+                        entries[key] = info
+                    elif info.storage_type is None:
+                        info.storage_type = p.StorageType.ToString()
+                        info.read_only = p.IsReadOnly
+                    if not info.bound:
+                        info.families.add(family)
+        self.categories[cat_id] = entries
+        self.sampled[cat_id] = (family_of, set(types), set(instances))
+        return entries
+
+    def _entries(self, category):
+        if not self.doc.IsValidObject:
+            self.invalidate()
+        elif self.bindings is not None and self.doc.ParameterBindings.Size != self.binding_count:
+            self.invalidate()
+        cat_id = category_id(category)
+        entries = self.categories.get(cat_id)
+        if entries is None:
+            entries = self._build(cat_id)
+        return entries
+
+    def parameters(self, category, instance=None, storage_type=None, editable=None,
+                   varies_across_groups=None, family=None):
+        # ParameterInfo records of a category sorted by name, a None argument does not filter
+        # family: only parameters an element of that family has (bound parameters always match)
+        found = []
+        for info in self._entries(category).values():
+            if instance is not None and info.is_instance != instance:
+                continue
+            if storage_type is not None and info.storage_type != storage_type:
+                continue
+            if editable is not None and info.read_only == editable:
+                continue
+            if varies_across_groups is not None and info.varies_across_groups != varies_across_groups:
+                continue
+            if family is not None and not info.bound and family not in info.families:
+                continue
+            found.append(info)
+        found.sort(key=lambda info: (info.name, info.is_instance))
+        return found
+
+    def names(self, category, instance=None, storage_type=None, editable=None,
+              varies_across_groups=None, family=None):
+        # sorted parameter names of a category, for the UI pickers
+        infos = self.parameters(category, instance, storage_type, editable, varies_across_groups, family)
+        return sorted(set(info.name for info in infos))
+
+    def find(self, category, key, instance=None):
+        # the record of a parameter by name, shared GUID or BuiltInParameter, None if the category has none
+        for info in self.parameters(category, instance):
+            if key in (info.name, info.guid, info.builtin):
+                return info
+        return None
+
+    def param_dict(self, category, instance=False, storage_type="String"):
+        # {GUID or BuiltInParameter: name} of the editable shared and built-in parameters
+        return IdNameMap((info.guid or info.builtin, info.name)
+                         for info in self.parameters(category, instance, storage_type, editable=True)
+                         if info.guid or info.builtin is not None)
+
+    def on_changed(self, change):
+        if self.bindings is None and not self.categories:
+            return
+        if self.parameter_ids.intersection(change.deleted_ids()):
+            self.invalidate()
+            return
+        if change.changed_ids(PARAMETER_OR_FAMILY_FILTER):
+            self.invalidate()
+            return
+        if not self.sampled:
+            return
+        # elements added to a sampled category may bring new families, the category is sampled again
+        sampled_ids = List[DB.ElementId](DB.ElementId(cat_id) for cat_id in self.sampled)
+        if not change.added_ids(DB.ElementMulticategoryFilter(sampled_ids)):
+            return
+        for cat_id in list(self.sampled):
+            if change.added_ids(DB.ElementCategoryFilter(DB.ElementId(cat_id))):
+                self.categories.pop(cat_id, None)
+                self.sampled.pop(cat_id, None)
+
+
+parameter_catalogs = changes.per_document("PYHP_PARAMETER_CATALOGS", ParameterCatalog)
+
+
+def parameter_catalog(doc=revit.doc):
+    # the ParameterCatalog of a document, for this run or for the session while tracking changes
+    return parameter_catalogs(doc)
+
+
+def lookup_parameter(element, info):
+    # the parameter of an element described by a catalog record
+    if info.guid:
+        return element.get_Parameter(info.guid)
+    if info.builtin is not None:
+        return element.get_Parameter(info.builtin)
+    return element.LookupParameter(info.name)
+
+
+def get_sheet(some_number, doc=revit.doc):
+    return document_index(doc).sheet(some_number)
+
+
+def get_view(some_name, doc=revit.doc):
+    return document_index(doc).view(some_name)
+
+
+def get_schedule(some_name, doc=revit.doc):
+    return document_index(doc).schedule(some_name)
+
+
+class FamilyLoadOptions(DB.IFamilyLoadOptions):
+    '''Reload families over the loaded ones, parameter values included'''
+    def OnFamilyFound(self, familyInUse, overwriteParameterValues):
+        overwriteParameterValues.Value = True
+        return True
+
+    def OnSharedFamilyFound(self, sharedFamily, familyInUse, source, overwriteParameterValues):
+        source.Value = DB.FamilySource.Family
+        overwriteParameterValues.Value = True
+        return True
+
+
+class FamilyRegistry:
+    '''Element types of a document by family name and by (family, type) name, walked once
+    Families loaded through load() are filed from the symbol ids of the loaded family, so they can be
+    found inside the loading transaction; other changes reach the registry through DocumentChanged'''
+    def __init__(self, doc):
+        self.doc = doc
+        self.built = False
+
+    def build(self):
+        # one collector over all element types
+        self.families = {}
+        self.types = {}
+        self.filed = {}
+        self.stale = set()
+        self.built = True
+        for element_type in DB.FilteredElementCollector(self.doc).WhereElementIsElementType():
+            self._file(element_type)
+
+    def _ensure(self):
+        if not self.built or not self.doc.IsValidObject:
+            self.build()
+        elif self.stale:
+            # file the types DocumentChanged reported as added or modified
+            for id_value in self.stale:
+                element_type = self.doc.GetElement(DB.ElementId(id_value))
+                if element_type is None:
+                    self._unfile(id_value)
+                else:
+                    self._file(element_type)
+            self.stale = set()
+
+    def _file(self, element_type):
+        self._unfile(element_type.Id.IntegerValue)
+        family_name = element_type.FamilyName
+        type_name = get_name(element_type)
+        self.families.setdefault(family_name, []).append(element_type)
+        self.types[(family_name, type_name)] = element_type
+        self.filed[element_type.Id.IntegerValue] = (family_name, type_name)
+
+    def _unfile(self, id_value):
+        if id_value not in self.filed:
+            return
+        family_name, type_name = self.filed.pop(id_value)
+        found = [t for t in self.families.get(family_name, ()) if t.Id.IntegerValue != id_value]
+        if found:
+            self.families[family_name] = found
+        else:
+            self.families.pop(family_name, None)
+        element_type = self.types.get((family_name, type_name))
+        if element_type is not None and element_type.Id.IntegerValue == id_value:
+            del self.types[(family_name, type_name)]
+
+    def update(self, element_type):
+        # call after renaming a type
+        if self.built:
+            self._file(element_type)
+
+    def file_family(self, family):
+        # file the symbols of a family, e.g. right after it was loaded
+        if self.built:
+            for symbol_id in family.GetFamilySymbolIds():
+                self._file(self.doc.GetElement(symbol_id))
+
+    def load(self, path, options=None):
+        # load a family file and file its symbols from the family LoadFamily returns
+        # returns the loaded family, None if Revit did not load it (e.g. it was already loaded unchanged)
+        family = clr.Reference[DB.Family]()
+        if self.doc.LoadFamily(path, options or FamilyLoadOptions(), family) and family.Value:
+            self.file_family(family.Value)
+            return family.Value
+        return None
+
+    def invalidate(self):
+        self.built = False
+
+    def on_changed(self, change):
+        # mark added and renamed types for refiling, drop deleted ones
+        if not self.built:
+            return
+        deleted = change.deleted_ids()
+        for id_value in deleted:
+            self._unfile(id_value)
+        self.stale.difference_update(deleted)
+        self.stale.update(change.changed_ids(ELEMENT_TYPE_FILTER))
+
+    def family_types(self, family_name, category=None):
+        # element types of a family, as a list; types of a rolled back transaction are skipped
+        # category (BuiltInCategory): only types of that category, e.g. to ignore system families
+        self._ensure()
+        found = [t for t in self.families.get(family_name, ()) if t.IsValidObject]
+        if category is not None:
+            found = [t for t in found if t.Category and t.Category.Id.IntegerValue == int(category)]
+        return found
+
+    def any_type(self, family_name, category=None):
+        # any type of a family, None if no family of that name is loaded
+        found = self.family_types(family_name, category)
+        return found[0] if found else None
+
+    def family_type(self, family_name, type_name):
+        # the type of a family by name, None if there is none
+        self._ensure()
+        element_type = self.types.get((family_name, type_name))
+        if element_type is not None and element_type.IsValidObject:
+            return element_type
+        return None
+
+    def family_names(self):
+        self._ensure()
+        return set(self.families)
+
+    def __contains__(self, family_name):
+        return bool(self.family_types(family_name))
+
+
+family_registries = changes.per_document("PYHP_FAMILY_REGISTRIES", FamilyRegistry)
+
+
+def family_registry(doc=revit.doc):
+    # the FamilyRegistry of a document, for this run or for the session while tracking changes
+    return family_registries(doc)
+
+
+def get_fam_types(family_name, doc=revit.doc):
+    return family_registry(doc).family_types(family_name)
+
+
+def get_fam_any_type(family_name, doc=revit.doc):
+    return family_registry(doc).any_type(family_name)
 
 
 def param_dict_by_cat(cat, is_instance_param=False, storage_type = "String", doc = revit.doc):
     # get all project type or instance parameters (as bip param or GUID) of a given category and storage type
     # can be used to gather parameters for UI selection
-    param_dict = {}
-    if is_instance_param:
-        collector = [DB.FilteredElementCollector(revit.doc).OfCategory(cat).WhereElementIsNotElementType().FirstElement()]
-    else:
-        collector = DB.FilteredElementCollector(revit.doc).OfCategory(cat).WhereElementIsElementType().ToElements()
-    for el in collector:
-        params = el.Parameters
-        for p in params:
-            if p.IsReadOnly == False and p.StorageType.ToString() == storage_type:
-                p_id = doc.GetElement(p.Definition.Id)
-                if p_id not in param_dict.keys() and p.IsShared:
-                    param_dict[p_id.GuidValue] = p.Definition.Name
-                elif p.Definition.BuiltInParameter not in param_dict.keys() \
-                        and p.Definition.BuiltInParameter != DB.BuiltInParameter.INVALID:
-                    param_dict[p.Definition.BuiltInParameter] = p.Definition.Name
-    return param_dict
-
-
-def create_sheet(sheet_num, sheet_name, titleblock):
+    return parameter_catalog(doc).param_dict(cat, is_instance_param, storage_type)
+
+
+def create_sheet(sheet_num, sheet_name, titleblock, preallocated=False):
+    # preallocated: sheet_num comes from sheet_number_allocator(), use it as it is
     sheet_num = str(sheet_num)
 
     new_datasheet = DB.ViewSheet.Create(revit.doc, titleblock)
     new_datasheet.Name = sheet_name
 
-    while get_sheet(sheet_num):
-        sheet_num = coreutils.increment_str(sheet_num, 1)
+    if not preallocated:
+        sheet_num = sheet_number_allocator(revit.doc).next(sheet_num)
     new_datasheet.SheetNumber = str(sheet_num)
+    document_index(revit.doc).update(new_datasheet)
 
     return new_datasheet
 
 
+def rename(element, name, doc=revit.doc):
+    # rename a view, sheet or schedule and refile it in the document index
+    element.Name = name
+    document_index(doc).update(element)
+    return name
+
+
 def set_anno_crop(v):
     anno_crop = v.get_Parameter(DB.BuiltInParameter.VIEWER_ANNOTATION_CROP_ACTIVE)
     anno_crop.Set(1)
@@ -113,42 +597,142 @@ def get_name(el, doc=revit.doc):
     return DB.Element.Name.__get__(el)
 
 
-def create_parallel_bbox(line, crop_elem, offset=300 / 304.8):
-    # create section parallel to x (solution by Building Coder)
-    p = line.GetEndPoint(0)
-    q = line.GetEndPoint(1)
-    v = q - p
-
-    # section box width
-    w = v.GetLength()
-    bb = crop_elem.get_BoundingBox(None)
-    minZ = bb.Min.Z
-    maxZ = bb.Max.Z
-    # height = maxZ - minZ
-
-    min = DB.XYZ(-w, minZ - offset, -offset)
-    max = DB.XYZ(w, maxZ + offset, offset)
-
-    centerpoint = p + 0.5 * v
-    direction = v.Normalize()
-    up = DB.XYZ.BasisZ
-    view_direction = direction.CrossProduct(up)
-
+def section_box_coords(p, q, min_z, max_z, offset=300 / 304.8):
+    # section box parallel to the line p-q as plain tuples, the same box create_parallel_bbox builds
+    # returns (origin, basis x, basis y, basis z, min, max); p and q are (x, y, ...) tuples
+    p = tuple(p) + (0.0,) * (3 - len(p))
+    q = tuple(q) + (0.0,) * (3 - len(q))
+    dx, dy, dz = q[0] - p[0], q[1] - p[1], q[2] - p[2]
+    w = (dx * dx + dy * dy + dz * dz) ** 0.5
+    direction = (dx / w, dy / w, dz / w)
+    up = (0.0, 0.0, 1.0)
+    # direction x up
+    view_direction = (direction[1], -direction[0], 0.0)
+    centerpoint = (p[0] + 0.5 * dx, p[1] + 0.5 * dy, p[2] + 0.5 * dz)
+    return (centerpoint, direction, up, view_direction,
+            (-w, min_z - offset, -offset), (w, max_z + offset, offset))
+
+
+def section_box_from_coords(coords):
+    # BoundingBoxXYZ from section_box_coords output
+    origin, basis_x, basis_y, basis_z, min_pt, max_pt = coords
     t = DB.Transform.Identity
-    t.Origin = centerpoint
-    t.BasisX = direction
-    t.BasisY = up
-    t.BasisZ = view_direction
+    t.Origin = DB.XYZ(*origin)
+    t.BasisX = DB.XYZ(*basis_x)
+    t.BasisY = DB.XYZ(*basis_y)
+    t.BasisZ = DB.XYZ(*basis_z)
 
     section_box = DB.BoundingBoxXYZ()
     section_box.Transform = t
-    section_box.Min = min
-    section_box.Max = max
+    section_box.Min = DB.XYZ(*min_pt)
+    section_box.Max = DB.XYZ(*max_pt)
+    return section_box
 
-    pt = DB.XYZ(centerpoint.X, centerpoint.Y, minZ)
-    point_in_front = pt + (-3) * view_direction
+
+def create_parallel_bbox(line, crop_elem, offset=300 / 304.8):
+    # create section parallel to x (solution by Building Coder)
+    bb = crop_elem.get_BoundingBox(None)
+    p = line.GetEndPoint(0)
+    q = line.GetEndPoint(1)
+    coords = section_box_coords((p.X, p.Y, p.Z), (q.X, q.Y, q.Z), bb.Min.Z, bb.Max.Z, offset)
     # TODO: check other usage
-    return section_box
+    return section_box_from_coords(coords)
+
+
+class NameAllocator:
+    '''Unique names handed out from memory
+    Seeded once with the names in use (or backed by a taken(name) check, e.g. a DocumentIndex lookup),
+    each reservation is then a set lookup. Taken names get the first free "name Copy N" suffix;
+    the last N is remembered per name, so repeated copies do not rescan from 1'''
+    def __init__(self, names=(), taken=None):
+        self.used = set(names)
+        self.taken = taken
+        self.copies = {}
+
+    def is_free(self, name):
+        return name not in self.used and not (self.taken and self.taken(name))
+
+    def reserve(self, name):
+        # name if free, otherwise the first free "name Copy N"; the result is taken
+        unique = name
+        if not self.is_free(unique):
+            n = self.copies.get(name, 1)
+            unique = "{} Copy {}".format(name, n)
+            while not self.is_free(unique):
+                n += 1
+                unique = "{} Copy {}".format(name, n)
+            self.copies[name] = n + 1
+        self.used.add(unique)
+        return unique
+
+    def reserve_many(self, names):
+        # reserve a batch of names up front, in order; repeated names get successive copies
+        return [self.reserve(name) for name in names]
+
+    def release(self, name):
+        self.used.discard(name)
+
+    def __contains__(self, name):
+        return not self.is_free(name)
+
+
+# (document key, kind) -> NameAllocator for view and schedule names
+name_allocators = {}
+
+
+def name_allocator(kind="view", doc=revit.doc):
+    # the name allocator of a document for "view" or "schedule" names, backed by the document index
+    # names it reserved stay taken until it is dropped, even before the views are created
+    key = (changes.doc_key(doc), kind)
+    allocator = name_allocators.get(key)
+    if allocator is None:
+        index = document_index(doc)
+        lookup = index.view if kind == "view" else index.schedule
+        allocator = NameAllocator(taken=lambda name: bool(lookup(name)))
+        name_allocators[key] = allocator
+    return allocator
+
+
+class SheetNumberAllocator:
+    '''Free sheet numbers handed out from memory, with the increments of create_sheet (coreutils.increment_str)
+    Seeded with the numbers in use or backed by a taken(number) check. The last number handed out
+    from each start is remembered, so a run of sheets from the same start does not rescan the sequence'''
+    def __init__(self, numbers=(), taken=None):
+        self.used = set(str(n) for n in numbers)
+        self.taken = taken
+        self.cursors = {}
+
+    def is_free(self, number):
+        return number not in self.used and not (self.taken and self.taken(number))
+
+    def next(self, start):
+        # the first free number from start on (continuing after the last one given for start)
+        start = str(start)
+        number = self.cursors.get(start, start)
+        while not self.is_free(number):
+            number = coreutils.increment_str(number, 1)
+        self.used.add(number)
+        self.cursors[start] = number
+        return number
+
+    def allocate(self, start, count):
+        # the next count free numbers from start, in sequence
+        return [self.next(start) for i in range(count)]
+
+
+# document key -> SheetNumberAllocator
+sheet_number_allocators = {}
+
+
+def sheet_number_allocator(doc=revit.doc):
+    # the sheet number allocator of a document, backed by the document index
+    key = changes.doc_key(doc)
+    allocator = sheet_number_allocators.get(key)
+    if allocator is None:
+        index = document_index(doc)
+        allocator = SheetNumberAllocator(taken=lambda number: bool(index.sheet(number)))
+        sheet_number_allocators[key] = allocator
+    return allocator
 
 
 def char_series(nr):
@@ -235,52 +819,162 @@ def get_mass_template_path():
         return fam_template_path
 
 
+def id_order(key):
+    # sort key of an id: ElementIds by value, ints as they are, other keys (GUIDs, BuiltInParameters) as text
+    if isinstance(key, DB.ElementId):
+        return (0, key.IntegerValue, "")
+    if isinstance(key, int):
+        return (0, key, "")
+    return (1, 0, str(key))
+
+
+class IdNameMap(dict):
+    '''{id: name} dict that keeps the reverse name -> ids lookup alongside
+    id_of(name) replaces a reverse scan of the values; names shared by several elements
+    are reported by duplicates(), and id_of returns the lowest of their ids'''
+    def __init__(self, items=()):
+        dict.__init__(self)
+        self.ids = {}
+        for key, name in items:
+            self[key] = name
+
+    def __setitem__(self, key, name):
+        if key in self:
+            self._drop(key)
+        dict.__setitem__(self, key, name)
+        self.ids.setdefault(name, []).append(key)
+
+    def __delitem__(self, key):
+        self._drop(key)
+        dict.__delitem__(self, key)
+
+    def _drop(self, key):
+        name = dict.__getitem__(self, key)
+        keys = self.ids[name]
+        keys.remove(key)
+        if not keys:
+            del self.ids[name]
+
+    def pop(self, key, *default):
+        if key in self:
+            self._drop(key)
+        return dict.pop(self, key, *default)
+
+    def update(self, other=(), **kwargs):
+        for key, name in dict(other, **kwargs).items():
+            self[key] = name
+
+    def clear(self):
+        dict.clear(self)
+        self.ids.clear()
+
+    def id_of(self, name, default=None):
+        # the id of the element with the given name, the lowest id when several share it
+        keys = self.ids.get(name)
+        return min(keys, key=id_order) if keys else default
+
+    def ids_of(self, name):
+        return sorted(self.ids.get(name, ()), key=id_order)
+
+    def has_name(self, name):
+        return name in self.ids
+
+    def duplicates(self):
+        # {name: [ids]} of the names used by more than one element
+        return {name: sorted(keys, key=id_order) for name, keys in self.ids.items() if len(keys) > 1}
+
+
 def id_name_dict (lst, int_value=False):
     if int_value:
-        return {el.Id.IntegerValue : get_name(el) for el in lst}
+        return IdNameMap((el.Id.IntegerValue, get_name(el)) for el in lst)
     else:
-        return {el.Id: get_name(el) for el in lst}
+        return IdNameMap((el.Id, get_name(el)) for el in lst)
 
 
 def key_by_val(dict, val):
-    for k, v in dict.items():
-        if v == val:
-            return k
+    # the key of a value, the lowest one (see id_order) when several keys share it
+    if isinstance(dict, IdNameMap):
+        return dict.id_of(val)
+    keys = [k for k, v in dict.items() if v == val]
+    return min(keys, key=id_order) if keys else None
+
+
+class IdNameMaps:
+    '''The id/name maps of a document, kept so the pickers open without collecting again
+    A map is dropped when one of its elements changes or is deleted, or when an element it would list is added'''
+    def __init__(self, doc):
+        self.doc = doc
+        self.maps = {}
+
+    def get(self, name, factory, element_filter):
+        # factory() builds the map, element_filter (a DB.ElementFilter) passes new elements that may belong in it
+        # callers get a copy, so changing it does not change the kept map
+        if not self.doc.IsValidObject:
+            self.maps = {}
+        if name not in self.maps:
+            self.maps[name] = (factory(), element_filter)
+        return IdNameMap(self.maps[name][0].items())
+
+    def invalidate(self):
+        self.maps = {}
+
+    def on_changed(self, change):
+        if not self.maps:
+            return
+        changed = change.modified_ids() | change.deleted_ids()
+        for name, (found, element_filter) in list(self.maps.items()):
+            if changed.intersection(found) or change.added_ids(element_filter):
+                del self.maps[name]
+
+
+id_name_maps_by_doc = changes.per_document("PYHP_ID_NAME_MAPS", IdNameMaps)
+
+
+def id_name_maps(doc=revit.doc):
+    # the IdNameMaps of a document, for this run or for the session while tracking changes
+    return id_name_maps_by_doc(doc)
 
 
 def templates_dict(doc=revit.doc):
     # all view templates in a doc
-    viewplans = DB.FilteredElementCollector(doc).OfClass(DB.ViewPlan)
-    viewtemplates = [v for v in viewplans if v.IsTemplate]
-    return id_name_dict(viewtemplates, True)
+    def build():
+        viewtemplates = [v for v in document_index(doc).all_templates() if isinstance(v, DB.ViewPlan)]
+        return id_name_dict(viewtemplates, True)
+    return id_name_maps(doc).get("templates", build, DB.ElementClassFilter(DB.ViewPlan))
 
 
 def tb_types_dict(doc=revit.doc):
-    tbs = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_TitleBlocks).WhereElementIsElementType().ToElements()
-    return id_name_dict(tbs, True)
+    def build():
+        tbs = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_TitleBlocks).WhereElementIsElementType().ToElements()
+        return id_name_dict(tbs, True)
+    return id_name_maps(doc).get("titleblocks", build,
+                                 DB.LogicalAndFilter(DB.ElementCategoryFilter(DB.BuiltInCategory.OST_TitleBlocks),
+                                                     DB.ElementIsElementTypeFilter()))
 
 
 def sh_dict(cat=None, doc=revit.doc):
     # get all schedules except revision schedules, output dict {}
-    all_sh = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_Schedules).WhereElementIsNotElementType()
-    if cat:
-        all_sh = [sh for sh in all_sh if sh.Definition.CategoryId == DB.Category.GetCategory(doc, cat).Id]
-    shs = [sh for sh in all_sh if "<Revision Schedule>" not in str(sh.Title)]
-    return id_name_dict(shs, True)
+    def build():
+        all_sh = document_index(doc).all_schedules()
+        if cat:
+            cat_id = DB.Category.GetCategory(doc, cat).Id
+            all_sh = [sh for sh in all_sh if sh.Definition.CategoryId == cat_id]
+        shs = [sh for sh in all_sh if "<Revision Schedule>" not in str(sh.Title)]
+        return id_name_dict(shs, True)
+    return id_name_maps(doc).get(("schedules", str(cat)), build, DB.ElementClassFilter(DB.ViewSchedule))
 
 
 def viewport_dict(doc=revit.doc):
-    return id_name_dict(get_viewport_types(doc), True)
+    return id_name_maps(doc).get("viewports", lambda: id_name_dict(get_viewport_types(doc), True),
+                                 DB.LogicalAndFilter(DB.ElementCategoryFilter(DB.BuiltInCategory.OST_Viewports),
+                                                     DB.ElementIsElementTypeFilter()))
 
 
 def vt_name_match(vt_name, doc=revit.doc):
     # return a view template with a given name, None if not found
-    views = DB.FilteredElementCollector(doc).OfClass(DB.View)
-    vt_match = None
-    for v in views:
-        if v.IsTemplate and v.Name == vt_name:
-            vt_match = v.Name
-    return vt_match
+    if document_index(doc).template(vt_name):
+        return vt_name
+    return None
 
 
 def vp_name_match(vp_name, doc=revit.doc):
@@ -305,27 +999,18 @@ def tb_name_match(lookup_name, doc=revit.doc):
 
 
 def sh_name_match(sh_name, doc=revit.doc):
-    schedules = DB.FilteredElementCollector(doc).OfCategory(
-        DB.BuiltInCategory.OST_Schedules).WhereElementIsNotElementType()
-    sh_match = None
-    for sh in schedules:
-        if revit.query.get_name(sh) == sh_name:
-            sh_match = revit.query.get_name(sh)
-    return sh_match
-
-
-def unique_view_name(name, suffix=None):
-    unique_v_name = name + suffix
-    while get_view(unique_v_name):
-        unique_v_name = unique_v_name + " Copy 1"
-    return unique_v_name
-
-
-def unique_schedule_name(name, suffix=None):
-    unique_s_name = name + suffix
-    while get_schedule(unique_s_name):
-        unique_s_name = unique_s_name + " Copy 1"
-    return unique_s_name
+    if document_index(doc).schedule(sh_name):
+        return sh_name
+    return None
+
+
+def unique_view_name(name, suffix="", doc=revit.doc):
+    # reserve a view name not in use, "name Copy N" when taken
+    return name_allocator("view", doc).reserve(name + suffix)
+
+
+def unique_schedule_name(name, suffix="", doc=revit.doc):
+    return name_allocator("schedule", doc).reserve(name + suffix)
 
 
 def shift_list(l, n):
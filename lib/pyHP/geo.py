@@ -1,7 +1,8 @@
 from pyrevit import revit, DB, script, forms, HOST_APP, coreutils
 import math
+from timeit import default_timer as timer
 from pyrevit.framework import List
-from pyHP import database
+from pyHP import database, spatial, boundary, poly, cache, shells, adjacency
 from Autodesk.Revit import Exceptions
 
 
@@ -9,26 +10,39 @@ from Autodesk.Revit import Exceptions
 def inverted_transform(element, view=revit.active_view):
     # get element location and return its inverted transform
     # can be used to translate geometry to 0,0,0 origin to recreate geometry inside a family
-    el_location = element.Location.Point
-    bb = element.get_BoundingBox(view)
-    orig_cs = bb.Transform
-    # Creates a transform that represents a translation via the specified vector.
-    translated_cs = orig_cs.CreateTranslation(el_location)
-    # Transform from the room location point to origin
-    return translated_cs.Inverse
+    # the translation is read from the location point directly, view is kept for compatibility
+    return DB.Transform.CreateTranslation(element.Location.Point.Negate())
 
 
-def room_bound_to_origin(room, translation):
+def simplified_loops(room, tol=0.003):
+    # room boundary loops with collinear runs merged and slivers dropped (see poly.simplify_loop)
+    # returns (loops, number of segments removed)
+    loops = []
+    removed = 0
+    for loop in boundary.get_loops(room):
+        simple, count = poly.simplify_loop(loop, tol)
+        loops.append(simple)
+        removed += count
+    return loops, removed
+
+
+def room_bound_to_origin(room, translation, simplify_tol=None, report=None):
+    # simplify_tol: merge collinear segments and drop slivers below this tolerance before sketching
+    # report: optional dict, receives {room id: (segments before, segments after simplification)}
     room_boundaries = DB.CurveArrArray()
     # get room boundary segments
-    room_segments = room.GetBoundarySegments(DB.SpatialElementBoundaryOptions())
-    # iterate through loops of segments and add them to the array
-    for seg_loop in room_segments:
+    if simplify_tol:
+        room_segments, removed = simplified_loops(room, simplify_tol)
+    else:
+        room_segments, removed = boundary.get_loops(room), 0
+    if report is not None:
+        kept = sum(len(loop) for loop in room_segments)
+        report[room.Id] = (kept + removed, kept)
+    # move all segments to origin in one pass, curves are only created for the sketch
+    for seg_loop in boundary.transform_loops(room_segments, translation):
         curve_array = DB.CurveArray()
         for s in seg_loop:
-            old_curve = s.GetCurve()
-            new_curve = old_curve.CreateTransformed(translation)  # move curves to origin
-            curve_array.Append(new_curve)
+            curve_array.Append(boundary.segment_to_curve(s))
         room_boundaries.Append(curve_array)
     return room_boundaries
 
@@ -40,24 +54,74 @@ def get_ref_lvl_plane(family_doc):
     return [plane for plane in find_planes if plane.Name == ref_level.Name]
 
 
-def find_crop_box(view):
-    with DB.TransactionGroup(revit.doc, "Temp to find crop") as tg:
+# view id -> crop box element id, kept for the run
+crop_box_cache = cache.Cache("crop boxes")
+
+
+def crop_box_by_sequence(view, doc=revit.doc):
+    # the crop region element is created right before its view, check that one first
+    candidate = doc.GetElement(DB.ElementId(view.Id.IntegerValue - 1))
+    if candidate and candidate.Category \
+            and candidate.Category.Id.IntegerValue == int(DB.BuiltInCategory.OST_Viewers) \
+            and candidate.Name == view.Name:
+        return candidate
+    return None
+
+
+def crop_boxes_by_toggle(views, doc=revit.doc):
+    # find crop box elements by toggling their visibility and comparing the elements in view
+    # all views are toggled together, inside one transaction group that is rolled back
+    with DB.TransactionGroup(doc, "Temp to find crop") as tg:
         tg.Start()
-        with DB.Transaction(revit.doc, "temp") as t2:
+        with DB.Transaction(doc, "temp") as t2:
             t2.Start()
-            view.CropBoxVisible = False
+            for view in views:
+                view.CropBoxVisible = False
             t2.Commit()
-            hidden = DB.FilteredElementCollector(revit.doc, view.Id).ToElementIds()
+            hidden = [DB.FilteredElementCollector(doc, view.Id).ToElementIds() for view in views]
             t2.Start()
-            view.CropBoxVisible = True
+            for view in views:
+                view.CropBoxVisible = True
             t2.Commit()
-            crop_box_el = DB.FilteredElementCollector(revit.doc, view.Id).Excluding(hidden).FirstElement()
-            tg.RollBack()
+            crop_boxes = []
+            for view, hidden_ids in zip(views, hidden):
+                collector = DB.FilteredElementCollector(doc, view.Id)
+                if hidden_ids.Count:
+                    collector = collector.Excluding(hidden_ids)
+                crop_boxes.append(collector.FirstElement())
+        tg.RollBack()
+    return crop_boxes
+
+
+def find_crop_boxes(views, doc=revit.doc):
+    # crop box elements of many views, {view id: crop box element or None}
+    # resolved from the session cache or the element sequence, the toggle trick only runs for the rest
+    found = {}
+    unresolved = []
+    for view in views:
+        crop_id = crop_box_cache.get(view.Id.IntegerValue, lambda: element_id_value(crop_box_by_sequence(view, doc)))
+        if crop_id is None:
+            unresolved.append(view)
+        else:
+            found[view.Id] = doc.GetElement(DB.ElementId(crop_id))
+    if unresolved:
+        for view, crop_box_el in zip(unresolved, crop_boxes_by_toggle(unresolved, doc)):
+            found[view.Id] = crop_box_el
             if crop_box_el:
-                return crop_box_el
+                crop_box_cache.put(view.Id.IntegerValue, crop_box_el.Id.IntegerValue)
             else:
                 print("CROP NOT FOUND")
-                return None
+    return found
+
+
+def element_id_value(el):
+    if el:
+        return el.Id.IntegerValue
+    return None
+
+
+def find_crop_box(view):
+    return find_crop_boxes([view])[view.Id]
 
 '''Create a new cropbox for a 3D view based on a Section Box
 Won't run if no Section Box is active'''
@@ -70,14 +134,11 @@ def crop_axo(view3d):
     crop_box = view3d.CropBox   # get the crop box of the view (bounding box)
     section_box = view3d.GetSectionBox()    # get the section box (bounding box)
     trans = crop_box.Transform  # get the view crop box Transform, will be used to convert from World Coordinates to View Coordinates
-    corners = bb_corners(section_box, trans)    # get the actual corners of the section box in View Coordinates
+    corners = bb_corner_coords(section_box, trans)    # get the actual corners of the section box in View Coordinates
 
-    minX = min(corners, key=lambda x: x.X).X    
-    minY = min(corners, key=lambda x: x.Y).Y
-    minZ = min(corners, key=lambda x: x.Z).Z
-    maxX = max(corners, key=lambda x: x.X).X
-    maxY = max(corners, key=lambda x: x.Y).Y
-    maxZ = max(corners, key=lambda x: x.Z).Z
+    xs, ys, zs = zip(*corners)
+    minX, minY, minZ = min(xs), min(ys), min(zs)
+    maxX, maxY, maxZ = max(xs), max(ys), max(zs)
 
     # offset by 1/10 of the crop box outword
     d = 0.05 * (maxX - minX)
@@ -94,21 +155,32 @@ def crop_axo(view3d):
 
     view3d.CropBox = crop_box
 
+
+def crop_axo_many(views, doc=revit.doc):
+    # recrop many 3D views to their section boxes in a single transaction
+    # views without an active section box are skipped; returns the cropped views
+    cropped = []
+    with revit.Transaction("Crop Axonometric Views", doc):
+        for view in views:
+            if isinstance(view, DB.View3D) and view.IsSectionBoxActive:
+                crop_axo(view)
+                cropped.append(view)
+    return cropped
+
+
+def bb_corner_coords(box, transform):
+    # the 8 corners of a bounding box in the coordinates of transform, as tuples
+    # the box-to-view transform is composed (and inverted) once for all corners
+    lo, hi = box.Min, box.Max
+    coords = [(lo.X, lo.Y, lo.Z), (hi.X, lo.Y, lo.Z), (lo.X, hi.Y, lo.Z), (hi.X, hi.Y, lo.Z),
+              (hi.X, hi.Y, hi.Z), (lo.X, hi.Y, hi.Z), (hi.X, lo.Y, hi.Z), (lo.X, lo.Y, hi.Z)]
+    rows = boundary.transform_rows(transform.Inverse.Multiply(box.Transform))
+    return boundary.apply_rows(rows, coords)
+
+
 '''A helper method to calculate the actual Section Box corners from World to View Coordinates'''
 def bb_corners(box, transform):
-    b_ll = box.Min    #lower left
-    b_lr = DB.XYZ(box.Max.X, box.Min.Y, box.Min.Z) # lower right
-    b_ul = DB.XYZ(box.Min.X, box.Max.Y, box.Min.Z) # upper left
-    b_ur = DB.XYZ(box.Max.X, box.Max.Y, box.Min.Z) # upper right
-    t_ur = box.Max # upper right
-    t_ul = DB.XYZ(box.Min.X, box.Max.Y, box.Max.Z) # upper left
-    t_lr = DB.XYZ(box.Max.X, box.Min.Y, box.Max.Z) # lower right
-    t_ll = DB.XYZ(box.Min.X, box.Min.Y, box.Max.Z) # lower left
-    out = [b_ll, b_lr, b_ul, b_ur, t_ur, t_ul, t_lr, t_ll]
-    for index, o in enumerate(out):
-        out[index] = box.Transform.OfPoint(out[index])
-        out[index] = transform.Inverse.OfPoint(out[index])
-    return out
+    return [DB.XYZ(*c) for c in bb_corner_coords(box, transform)]
     
 
 def point_equal_list(pt, lst):
@@ -119,34 +191,80 @@ def point_equal_list(pt, lst):
         return None
 
 
-def get_open_ends(curves_list):
+def curve_ends(curve):
+    # endpoints of a curve as plain tuples
+    return (boundary.xyz_tuple(curve.GetEndPoint(0)), boundary.xyz_tuple(curve.GetEndPoint(1)))
+
+
+def get_open_ends(curves_list, tol=0.003):
     #check if any open ends in a curves list
-    endpoints = []
-    for curve in curves_list:
-        for i in range(2):
-            duplicate = point_equal_list(curve.GetEndPoint(i), endpoints)
-            if duplicate:
-                endpoints.remove(duplicate)
-            else:
-                endpoints.append(curve.GetEndPoint(i))
+    endpoints = spatial.open_ends([curve_ends(curve) for curve in curves_list], tol)
     if endpoints:
-        return endpoints
+        return [DB.XYZ(*pt) for pt in endpoints]
     else:
         return None
 
 
+def rooms_open_ends(rooms, tol=0.003):
+    # check the boundary loops of many rooms in one go
+    # returns {room id: [open end XYZ]} for the rooms with open boundaries only
+    loops_by_room = {}
+    for r in rooms:
+        loops_by_room[r.Id] = boundary.get_loops(r)
+    report = spatial.open_ends_report(loops_by_room, tol)
+    return {room_id: [DB.XYZ(*pt) for pt in ends] for room_id, ends in report.items()}
+
+
+def level_open_ends(level, doc=revit.doc, tol=0.003):
+    # open boundary ends of all placed rooms on a level, {room id: [open end XYZ]}
+    rooms = DB.FilteredElementCollector(doc) \
+        .OfCategory(DB.BuiltInCategory.OST_Rooms) \
+        .WherePasses(DB.ElementLevelFilter(level.Id)) \
+        .WhereElementIsNotElementType()
+    return rooms_open_ends([r for r in rooms if r.Area > 0], tol)
+
+
+
+def heal_rooms(rooms, tol=0.003, gap_tol=None):
+    # repair the boundary loops of many rooms in one pass (see poly.heal_loop)
+    # healed loops replace the cached boundaries, so all geo helpers use them from then on
+    # returns {room id: actions} for the rooms that were repaired or still have open ends
+    summary = {}
+    for room in rooms:
+        loops = boundary.get_loops(room)
+        healed = []
+        totals = {}
+        for loop in loops:
+            healed_loop, actions = poly.heal_loop(loop, tol, gap_tol)
+            healed.append(healed_loop)
+            for key, count in actions.items():
+                totals[key] = totals.get(key, 0) + count
+        if any(totals.values()):
+            boundary.boundary_cache.replace(room, healed)
+            summary[room.Id] = totals
+    return summary
+
+
+def describe_healing(actions):
+    # human readable summary of heal_loop actions
+    labels = [("snapped", "endpoints snapped"),
+              ("zero_length", "zero-length segments removed"),
+              ("overlaps", "overlapping segments removed"),
+              ("gaps_closed", "gaps closed"),
+              ("open_ends", "open ends left")]
+    return ", ".join("{} {}".format(actions[key], label) for key, label in labels if actions.get(key))
+
 
 def get_room_bound(r):
     room_boundaries = DB.CurveLoop()
     # get room boundary segments
-    room_segments = r.GetBoundarySegments(DB.SpatialElementBoundaryOptions())
+    room_segments = boundary.get_loops(r)
     # iterate through loops of segments and add them to the array
     outer_loop = room_segments[0]
-    # for curve in outer_loop:
-    curve_loop = [s.GetCurve() for s in outer_loop]
-    open_ends = get_open_ends(curve_loop)
+    open_ends = spatial.open_ends(outer_loop)
     if open_ends:
         return None
+    curve_loop = [boundary.segment_to_curve(s) for s in outer_loop]
     for curve in curve_loop:
         # try:
         room_boundaries.Append(curve)
@@ -157,54 +275,34 @@ def get_room_bound(r):
 
 def get_longest_boundary(r):
     # get the rooms's longest boundary that is not an arc
-    bound = r.GetBoundarySegments(DB.SpatialElementBoundaryOptions())
+    bound = boundary.get_loops(r)
     longest = None
+    longest_length = 0
     for loop in bound:
         for b in loop:
-            curve = b.GetCurve()
-            if curve.Length > longest and isinstance(curve, DB.Line):
-                longest = curve
-    return longest
+            length = boundary.chord_length(b)
+            if length > longest_length and not b.is_arc:
+                longest = b
+                longest_length = length
+    if longest:
+        return boundary.segment_to_curve(longest)
+    return None
+
+
+def straight_segments(room):
+    # all straight boundary segments of a room, from the boundary cache
+    return [s for loop in boundary.get_loops(room) for s in loop if not s.is_arc]
 
 
 def room_rotation_angle(room):
-    # get the angle of the room's longest boundary to Y axis
-    # choose one longest curve to use as reference for rotation
-
-    longest_boundary = get_longest_boundary(room)
-    p = longest_boundary.GetEndPoint(0)
-    q = longest_boundary.GetEndPoint(1)
-    v = q - p
-
-    y1 = room.Location.Point
-    y2 = DB.XYZ(y1.X, y1.Y+1, y1.Z)
-    y_dir = y2-y1
-
-    # get angle and correct value
-    angle = v.AngleTo(y_dir)
-    # print ("initial angle: {}\n".format(math.degrees(angle)))
-
-    rotation = DB.Transform.CreateRotation(DB.XYZ.BasisZ, -angle)
-    rotated_vector = rotation.OfVector(v)
-    must_be_zero = math.degrees(rotated_vector.AngleTo(y_dir))
-    # print ("angle between rotated and Y vector : {}\n".format(math.degrees(must_be_zero)))
-    if round(must_be_zero, 0) != math.radians(0):
-        angle = -angle
-        rotation2 = DB.Transform.CreateRotation(DB.XYZ.BasisZ, -angle)
-        rotated_vector2 = rotation2.OfVector(v)
-        must_be_zero2 = math.degrees(rotated_vector2.AngleTo(y_dir))
-        # print("corrected angle {}, second check{}".format(math.degrees(angle), math.degrees(must_be_zero2)))
-        if round(must_be_zero2,0) != math.radians(0):
-            angle = math.radians(90)-angle
-
-
-    while abs(angle) > math.radians(90):
-        if angle > math.radians(0):
-            angle = angle - math.radians(90)
-        elif angle < math.radians(0):
-            angle = angle + math.radians(90)
-    # print ("final angle", angle)
-    return angle
+    # get the dominant orientation of the room's straight boundaries, folded to -45..45 degrees
+    # rotating the room by -angle aligns its dominant walls with the X and Y axes
+    return poly.orientation(straight_segments(room))
+
+
+def room_rotation_angles(rooms):
+    # rotation angles for a list of rooms, in the same order
+    return poly.orientations([straight_segments(room) for room in rooms])
 
 
 def get_bb_outline(bb):
@@ -223,59 +321,65 @@ def get_bb_outline(bb):
     return curves_set
 
 
-def set_crop_to_bb(element, view, crop_offset, doc=revit.doc):
-    # set the crop box of the view to elements's bounding box in that view
-    # draw 2 sets of outlines for each orientation (front/back, left/right)
-    # # deactivate crop first, just to make sure the element appears in view
-    view.CropBoxActive = False
-    doc.Regenerate()
+def dot3(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
 
-    bb = element.get_BoundingBox(view)
+def bb_world_coords(bb):
+    # the 8 corners of a bounding box in model coordinates, as tuples
+    lo, hi = bb.Min, bb.Max
+    coords = [(x, y, z) for x in (lo.X, hi.X) for y in (lo.Y, hi.Y) for z in (lo.Z, hi.Z)]
+    return boundary.apply_rows(boundary.transform_rows(bb.Transform), coords)
 
-    pt1 = DB.XYZ(bb.Max.X, bb.Max.Y, bb.Min.Z)
-    pt2 = DB.XYZ(bb.Max.X, bb.Max.Y, bb.Max.Z)
-    pt3 = DB.XYZ(bb.Min.X, bb.Min.Y, bb.Max.Z)
-    pt4 = DB.XYZ(bb.Min.X, bb.Min.Y, bb.Min.Z)
 
-    pt7 = DB.XYZ(bb.Min.X, bb.Max.Y, bb.Min.Z)
-    pt8 = DB.XYZ(bb.Min.X, bb.Max.Y, bb.Max.Z)
-    pt5 = DB.XYZ(bb.Max.X, bb.Min.Y, bb.Max.Z)
-    pt6 = DB.XYZ(bb.Max.X, bb.Min.Y, bb.Min.Z)
+def view_rectangle(coords, right, up, direction, offset):
+    # rectangle around coords in the view plane, offset outwards, as 4 model points
+    # right, up and direction are the view's orthonormal axes; the rectangle lies at the middle depth
+    us = [dot3(c, right) for c in coords]
+    vs = [dot3(c, up) for c in coords]
+    ws = [dot3(c, direction) for c in coords]
+    w = 0.5 * (min(ws) + max(ws))
+    u0, u1 = min(us) - offset, max(us) + offset
+    v0, v1 = min(vs) - offset, max(vs) + offset
+    return [tuple(u * right[i] + v * up[i] + w * direction[i] for i in range(3))
+            for u, v in ((u0, v0), (u1, v0), (u1, v1), (u0, v1))]
 
-    l1 = DB.Line.CreateBound(pt1, pt2)
-    l2 = DB.Line.CreateBound(pt2, pt3)
-    l3 = DB.Line.CreateBound(pt3, pt4)
-    l4 = DB.Line.CreateBound(pt4, pt1)
 
-    l5 = DB.Line.CreateBound(pt6, pt5)
-    l6 = DB.Line.CreateBound(pt5, pt8)
-    l7 = DB.Line.CreateBound(pt8, pt7)
-    l8 = DB.Line.CreateBound(pt7, pt6)
+def crop_loop_in_view(bb, view, crop_offset):
+    # crop CurveLoop around a bounding box, in the plane of the view, offset outwards
+    pts = view_rectangle(bb_world_coords(bb),
+                         boundary.xyz_tuple(view.RightDirection),
+                         boundary.xyz_tuple(view.UpDirection),
+                         boundary.xyz_tuple(view.ViewDirection),
+                         crop_offset)
+    pts = [DB.XYZ(*pt) for pt in pts]
+    lines = [DB.Line.CreateBound(pts[i], pts[(i + 1) % 4]) for i in range(4)]
+    return DB.CurveLoop.Create(List[DB.Curve](lines))
 
-    curves_set1 = [l1, l2, l3, l4]
-    curves_set2 = [l5, l6, l7, l8]
 
-    crsm = view.GetCropRegionShapeManager()
-    view_direction = view.ViewDirection
+def set_crop_to_bb(element, view, crop_offset, doc=revit.doc):
+    # set the crop box of the view to elements's bounding box in that view
+    set_crops_to_bb([(element, view)], crop_offset, doc)
+    return
 
-    view.CropBoxActive = True
 
-    try:
-        # try with set 1, if doesn't work try with set 2
-        crop_loop = DB.CurveLoop.Create(List[DB.Curve](curves_set1))
-        # offset the crop with the specified offset
-        curve_loop_offset = DB.CurveLoop.CreateViaOffset(crop_loop, crop_offset, view_direction)
-        # in case the offset works inwards, correct it to offset outwards
-        if curve_loop_offset.GetExactLength() < crop_loop.GetExactLength():
-            curve_loop_offset = DB.CurveLoop.CreateViaOffset(crop_loop, crop_offset, -view_direction)
-        crsm.SetCropShape(curve_loop_offset)
-    except:
-        crop_loop = DB.CurveLoop.Create(List[DB.Curve](curves_set2))
-
-        curve_loop_offset = DB.CurveLoop.CreateViaOffset(crop_loop, crop_offset, view_direction) # fails here
-        if curve_loop_offset.GetExactLength() < crop_loop.GetExactLength():
-            curve_loop_offset = DB.CurveLoop.CreateViaOffset(crop_loop, crop_offset, -view_direction)
-        crsm.SetCropShape(curve_loop_offset)
+def set_crops_to_bb(pairs, crop_offset, doc=revit.doc):
+    # set the crop of each view to its element's bounding box in that view, for (element, view) pairs
+    # the offset rectangle is computed in the view plane, one regeneration for the whole batch
+    pairs = list(pairs)
+    # deactivate crop first, just to make sure the elements appear in their views
+    for element, view in pairs:
+        view.CropBoxActive = False
+    doc.Regenerate()
+
+    boxes = [element.get_BoundingBox(view) for element, view in pairs]
+    for (element, view), bb in zip(pairs, boxes):
+        # views whose element has no bounding box are left uncropped
+        if not bb:
+            continue
+        view.CropBoxActive = True
+        crsm = view.GetCropRegionShapeManager()
+        crsm.SetCropShape(crop_loop_in_view(bb, view, crop_offset))
     return
 
 
@@ -302,28 +406,20 @@ def get_aligned_crop(geo, transform):
     return crop_loop
 
 
+def border_axis(curve):
+    # (mid point, direction) of a curve as plain tuples
+    if isinstance(curve, DB.Line):
+        p, q = curve_ends(curve)
+        return boundary.midpoint(p, q), (q[0] - p[0], q[1] - p[1], q[2] - p[2])
+    deriv = curve.ComputeDerivatives(0.5, True)
+    return boundary.xyz_tuple(deriv.Origin), boundary.xyz_tuple(deriv.BasisX)
+
+
 def get_unique_borders(borders, tol):
-    # sort the borders discarding overlapping ones (lying on same axis)
-    axis_set = []
-    sorted_lines = []
-    for curve in borders:
-        deriv = curve.ComputeDerivatives(0.5, True)
-        tangent = deriv.BasisX
-        pt = curve.Evaluate(0.5, True)
-        axis = DB.Line.CreateUnbound(pt, tangent)
-        on_axis = False
-        if not axis_set:
-            axis_set.append(axis)
-            sorted_lines.append(curve)
-        for line in axis_set:
-            distance = line.Distance(pt)
-            # print (distance)
-            if distance <= tol:
-                on_axis = True
-        if not on_axis:
-            axis_set.append(axis)
-            sorted_lines.append(curve)
-    return sorted_lines
+    # sort the borders discarding overlapping ones (lying on same axis), the first one wins
+    borders = list(borders)
+    kept = poly.unique_axes([border_axis(curve) for curve in borders], tol)
+    return [borders[i] for i in kept]
 
 
 def discard_short(curves, threshold=600/304.8):
@@ -331,33 +427,32 @@ def discard_short(curves, threshold=600/304.8):
 
 
 def room_to_freeform(r, family_doc):
-    room_geo = r.ClosedShell
-    for geo in room_geo:
-        if isinstance(geo, DB.Solid) and geo.Volume > 0.0:
-            freeform = DB.FreeFormElement.Create(family_doc, geo)
-            family_doc.Regenerate()
-            delta = DB.XYZ(0, 0, 0) - freeform.get_BoundingBox(None).Min
-            move_ff = DB.ElementTransformUtils.MoveElement(
-                family_doc, freeform.Id, delta
-            )
-            # create and associate a material parameter
-            ext_mat_param = freeform.get_Parameter(DB.BuiltInParameter.MATERIAL_ID_PARAM)
-            new_mat_param = family_doc.FamilyManager.AddParameter("Material",
-                                                                  DB.BuiltInParameterGroup.PG_MATERIALS,
-                                                                  DB.ParameterType.Material,
-                                                                  True)
-            family_doc.FamilyManager.AssociateElementParameterToFamilyParameter(ext_mat_param,
-                                                                                new_mat_param)
+    # shell solids are cached per room version, reruns over unchanged rooms skip ClosedShell
+    for geo in shells.get_solids(r):
+        freeform = DB.FreeFormElement.Create(family_doc, geo)
+        family_doc.Regenerate()
+        delta = DB.XYZ(0, 0, 0) - freeform.get_BoundingBox(None).Min
+        move_ff = DB.ElementTransformUtils.MoveElement(
+            family_doc, freeform.Id, delta
+        )
+        # create and associate a material parameter
+        ext_mat_param = freeform.get_Parameter(DB.BuiltInParameter.MATERIAL_ID_PARAM)
+        new_mat_param = family_doc.FamilyManager.AddParameter("Material",
+                                                              DB.BuiltInParameterGroup.PG_MATERIALS,
+                                                              DB.ParameterType.Material,
+                                                              True)
+        family_doc.FamilyManager.AssociateElementParameterToFamilyParameter(ext_mat_param,
+                                                                            new_mat_param)
     return freeform
 
 
-def room_to_extrusion(r, family_doc):
+def room_to_extrusion(r, family_doc, simplify_tol=None, report=None):
     output = script.get_output()
     room_height = r.get_Parameter(DB.BuiltInParameter.ROOM_HEIGHT).AsDouble()
     # helper: define inverted transform to translate room geometry to origin
     geo_translation = inverted_transform(r)
     # collect room boundaries and translate them to origin
-    room_boundaries = room_bound_to_origin(r, geo_translation)
+    room_boundaries = room_bound_to_origin(r, geo_translation, simplify_tol, report)
     # skip if the boundaries are not a closed loop (can happen with misaligned boundaries)
     if not room_boundaries:
         print("Extrusion failed for room {}. Try fixing room boundaries".format(output.linkify(r.Id)))
@@ -382,33 +477,30 @@ def room_to_extrusion(r, family_doc):
         return
 
 
-def create_room_axo_rotate(room, angle=None, view_scale=50, doc=revit.doc):
+def room_section_box(room, angle=None):
+    # section box around a room, rotated by angle about its location point
+    # plan extents come from the boundary polygon; rotating about Z keeps the height,
+    # so the Z range is read from the room's bounding box and the shell is never transformed
     if angle == None:
         angle = room_rotation_angle(room)
+    origin = room.Location.Point
+    min_x, min_y, max_x, max_y = poly.extents_at_angle(room_plan_points(room), angle, (origin.X, origin.Y))
+    room_bb = room.get_BoundingBox(None)
+
+    section_box = DB.BoundingBoxXYZ()
+    section_box.Transform = DB.Transform.CreateRotationAtPoint(DB.XYZ.BasisZ, angle, origin)
+    section_box.Min = DB.XYZ(min_x, min_y, room_bb.Min.Z)
+    section_box.Max = DB.XYZ(max_x, max_y, room_bb.Max.Z)
+    return section_box
 
-    # create 3D axo for a room, rotate the Section Box to fit
-    threeD_type = database.get_view_family_types(DB.ViewFamily.ThreeDimensional, doc)[0]
 
+def create_axo_view(section_box, threeD_type, view_scale=50, doc=revit.doc):
+    # create an isometric view with the given section box and the standard axo orientation
     threeD = DB.View3D.CreateIsometric(doc, threeD_type.Id)
     threeD.Scale = view_scale
 
-    # 1. rotate room geometry
-    room_shell = room.ClosedShell
-    rotation = DB.Transform.CreateRotationAtPoint(DB.XYZ.BasisZ, -angle, room.Location.Point)
-    rotated_shell = room_shell.GetTransformed(rotation)
-
-    # 2. get the bbox of the rotated shell
-    shell_bb = rotated_shell.GetBoundingBox()
-    rotate_back = rotation.Inverse
-
-    # rotate the bbox back
-    new_bb = DB.BoundingBoxXYZ()
-    new_bb.Transform = rotate_back
-    new_bb.Min = shell_bb.Min
-    new_bb.Max = shell_bb.Max
-
     # set bbox as section box
-    sb = threeD.SetSectionBox(new_bb)
+    threeD.SetSectionBox(section_box)
 
     # set orientation
     eye = DB.XYZ(0, 0, 0)
@@ -418,16 +510,310 @@ def create_room_axo_rotate(room, angle=None, view_scale=50, doc=revit.doc):
     view_orientation = DB.ViewOrientation3D(eye, up, fwd)
     threeD.SetOrientation(view_orientation)
     threeD.CropBoxActive = True
+    return threeD
+
+
+def create_room_axo_rotate(room, angle=None, view_scale=50, doc=revit.doc):
+    # create 3D axo for a room, rotate the Section Box to fit
+    threeD_type = database.get_view_family_types(DB.ViewFamily.ThreeDimensional, doc)[0]
+    threeD = create_axo_view(room_section_box(room, angle), threeD_type, view_scale, doc)
     doc.Regenerate()
     crop_axo(threeD)
 
     return threeD
 
 
-def room_bb_outlines(room, angle=None):
-    if angle==None:
-        angle=room_rotation_angle(room)
+def create_room_axos(rooms, view_scale=50, doc=revit.doc):
+    # create rotated 3D axos for many rooms, call inside a transaction
+    # the view type is resolved once and all section boxes are computed before the document is touched;
+    # views are created with a single regeneration before cropping
+    # returns [(room, view, seconds)], the regeneration time is shared equally between the rooms
+    rooms = [room for room in rooms if boundary.get_loops(room)]
+    if not rooms:
+        return []
+    threeD_type = database.get_view_family_types(DB.ViewFamily.ThreeDimensional, doc)[0]
+
+    timings = []
+    boxes = []
+    for room in rooms:
+        start = timer()
+        boxes.append(room_section_box(room))
+        timings.append(timer() - start)
+
+    views = []
+    for index, section_box in enumerate(boxes):
+        start = timer()
+        views.append(create_axo_view(section_box, threeD_type, view_scale, doc))
+        timings[index] += timer() - start
+
+    start = timer()
+    doc.Regenerate()
+    shared = (timer() - start) / len(rooms)
+
+    for index, view in enumerate(views):
+        start = timer()
+        crop_axo(view)
+        timings[index] += timer() - start + shared
+
+    return list(zip(rooms, views, timings))
+
+
+def elevation_walls(room, tol=300 / 304.8, min_length=600 / 304.8):
+    # straight walls of a room's outer boundary to elevate, as (start, end) tuples, in pure Python
+    # collinear walls are reduced to the first one (as get_unique_borders) and short ones dropped
+    # (as discard_short); each line runs so a section along it looks from inside the room at the wall
+    loops = boundary.get_loops(room)
+    if not loops:
+        return []
+    outer = loops[0]
+    ccw = poly.area(poly.loop_xy(outer)) > 0
+    lines = []
+    for s in outer:
+        if s.is_arc or boundary.chord_length(s) <= min_length:
+            continue
+        # the room is left of a counter-clockwise segment, reverse it to look outwards
+        lines.append((s.end, s.start) if ccw else (s.start, s.end))
+    axes = [(boundary.midpoint(p, q), (q[0] - p[0], q[1] - p[1])) for p, q in lines]
+    return [lines[i] for i in poly.unique_axes(axes, tol)]
+
+
+def elevation_name(room, n):
+    # "<number> - <name> - A" for the n-th elevation of a room, numbers past Z
+    number = room.get_Parameter(DB.BuiltInParameter.ROOM_NUMBER).AsString()
+    name = room.get_Parameter(DB.BuiltInParameter.ROOM_NAME).AsString()
+    suffix = database.char_i(n) if n < 26 else str(n + 1)
+    return "{} - {} - {}".format(number, name, suffix)
+
+
+def create_interior_elevations(rooms, section_type, view_template=None, crop_offset=300 / 304.8,
+                               box_offset=300 / 304.8, tol=300 / 304.8, min_length=600 / 304.8, doc=revit.doc):
+    # interior elevations for many rooms: the walls and section boxes are computed up front,
+    # all sections are created in one transaction and cropped to their rooms after a single regeneration
+    # names come from the document's in-memory view name allocator
+    # returns [(room, section view)]
+    plans = []
+    for room in rooms:
+        walls = elevation_walls(room, tol, min_length)
+        if not walls:
+            continue
+        bb = room.get_BoundingBox(None)
+        plans.append((room, [database.section_box_coords(p, q, bb.Min.Z, bb.Max.Z, box_offset) for p, q in walls]))
+    names = database.name_allocator("view", doc)
+    created = []
+    with revit.Transaction("Create Interior Elevations", doc):
+        for room, boxes in plans:
+            for n, coords in enumerate(boxes):
+                view = DB.ViewSection.CreateSection(doc, section_type.Id, database.section_box_from_coords(coords))
+                database.rename(view, names.reserve(elevation_name(room, n)), doc)
+                database.apply_vt(view, view_template)
+                created.append((room, view))
+        set_crops_to_bb(created, crop_offset, doc)
+    return created
+
+
+def room_plan_points(room, tol=1 / 304.8):
+    # outer boundary of a room as plan points, arcs discretised to tol
+    loops = boundary.get_loops(room)
+    if not loops:
+        return []
+    return poly.loop_points(loops[0], tol)
+
+
+def room_polygons(room, tol=1 / 304.8):
+    # boundary loops of a room as flat coordinate arrays (see pyHP.poly), the outer loop first
+    return [poly.loop_xy(loop, tol) for loop in boundary.get_loops(room)]
+
+
+def room_plan_area(room):
+    # area enclosed by the room's boundary loops, the inner loops are holes
+    polygons = room_polygons(room)
+    if not polygons:
+        return 0.0
+    return abs(poly.area(polygons[0])) - sum(abs(poly.area(xy)) for xy in polygons[1:])
+
+
+def room_centroid(room):
+    # (x, y) area centroid of the room's outer boundary
+    polygons = room_polygons(room)
+    if not polygons:
+        return None
+    return poly.centroid(polygons[0])
+
+
+class RoomLocator:
+    '''Which room contains a point, answered from per level polygon indexes of the room boundaries
+    Replaces IsPointInRoom / GetRoomAtPoint calls per candidate; the boundaries are read once'''
+    def __init__(self, rooms, tol=1 / 304.8):
+        by_level = {}
+        self.elevations = {}
+        for room in rooms:
+            polygons = room_polygons(room, tol)
+            if not polygons:
+                # unplaced or not enclosed
+                continue
+            level_id = room.LevelId.IntegerValue
+            by_level.setdefault(level_id, []).append((room, polygons))
+            self.elevations[level_id] = room.Level.Elevation
+        self.levels = dict((level_id, poly.PolygonIndex(items)) for level_id, items in by_level.items())
+        self.by_elevation = sorted((elevation, level_id) for level_id, elevation in self.elevations.items())
+
+    def level_at(self, z, tol=0.01):
+        # the highest indexed level at or below z
+        found = None
+        for elevation, level_id in self.by_elevation:
+            if elevation > z + tol:
+                break
+            found = level_id
+        return found
+
+    def room_at(self, point, level=None):
+        # room containing an XYZ point on a level (Level, ElementId or integer id), the level is taken from Z if omitted
+        return self.rooms_at([point], level)[0]
+
+    def rooms_at(self, points, level=None):
+        # rooms for a batch of XYZ points, None where a point is outside all rooms
+        if level is not None:
+            if isinstance(level, DB.ElementId):
+                level = level.IntegerValue
+            elif not isinstance(level, int):
+                level = level.Id.IntegerValue
+            index = self.levels.get(level)
+            if index is None:
+                return [None] * len(points)
+            return index.locate_many([(p.X, p.Y) for p in points])
+        rooms = []
+        for p in points:
+            index = self.levels.get(self.level_at(p.Z))
+            rooms.append(index.locate(p.X, p.Y) if index else None)
+        return rooms
+
+
+def room_locator(doc=revit.doc, phase=None):
+    # RoomLocator for all placed rooms of a document, optionally of one phase only
+    rooms = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_Rooms).WhereElementIsNotElementType()
+    if phase is not None:
+        rooms = [r for r in rooms if r.get_Parameter(DB.BuiltInParameter.ROOM_PHASE).AsElementId() == phase.Id]
+    return RoomLocator(rooms)
+
+
+def room_adjacency(rooms, options=None):
+    # adjacency graph (pyHP.adjacency) of rooms keyed by room id value, linked room - wall - room
+    # boundary segments are read once per room; rooms without a boundary are included without links
+    # rooms are only linked where their height ranges overlap, so stacked rooms sharing a wall are not neighbours
+    boundaries = {}
+    heights = {}
+    for room in rooms:
+        boundaries[room.Id.IntegerValue] = boundary.extract_elements(room, options)
+        if room.Level:
+            bottom = room.Level.Elevation + room.BaseOffset
+            heights[room.Id.IntegerValue] = (bottom, bottom + room.UnboundedHeight)
+    return adjacency.AdjacencyGraph(boundaries, heights=heights)
+
+
+def level_adjacency(level, doc=revit.doc, options=None):
+    # adjacency graph of the placed rooms on a level, or of the whole model if level is None
+    rooms = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_Rooms).WhereElementIsNotElementType()
+    if level is not None:
+        rooms = [r for r in rooms if r.LevelId == level.Id]
+    return room_adjacency([r for r in rooms if r.Area > 0], options)
+
+
+def parameter_text(element, name):
+    # value of a named parameter as text, None when missing or empty
+    param = element.LookupParameter(name)
+    if not param or not param.HasValue:
+        return None
+    if param.StorageType == DB.StorageType.String:
+        return param.AsString() or None
+    return param.AsValueString() or None
+
+
+def merged_room_outlines(rooms, parameter, gap=300 / 304.8, tol=1 / 304.8):
+    # outlines of groups of rooms sharing a parameter value, e.g. the rooms of a flat by unit number
+    # rooms up to gap apart (internal walls) are merged, see poly.merge_outlines; no Revit solids involved
+    # returns {value: [[outer, hole, ...], ...]} with the loops as flat xy arrays, largest polygon first
+    groups = {}
+    for room in rooms:
+        value = parameter_text(room, parameter)
+        if value is None:
+            continue
+        polygons = room_polygons(room, tol)
+        if polygons:
+            groups.setdefault(value, []).append(polygons)
+    return dict((value, poly.merge_outlines(polygons, gap, tol)) for value, polygons in groups.items())
+
+
+def plan_outline(element, tol=1 / 304.8):
+    # plan outline of an element's solid geometry, from its largest downward facing planar face
+    # returns a flat xy array (see pyHP.poly), None when the element has no such face
+    options = DB.Options()
+    bottom = None
+    geometry = list(element.get_Geometry(options) or ())
+    for geo in list(geometry):
+        if isinstance(geo, DB.GeometryInstance):
+            geometry.extend(geo.GetInstanceGeometry())
+    for geo in geometry:
+        if not isinstance(geo, DB.Solid) or not geo.Volume > 0.0:
+            continue
+        for face in geo.Faces:
+            if isinstance(face, DB.PlanarFace) and face.FaceNormal.Z < -0.99:
+                if bottom is None or face.Area > bottom.Area:
+                    bottom = face
+    if bottom is None:
+        return None
+    outlines = []
+    for loop in bottom.GetEdgesAsCurveLoops():
+        pts = []
+        for curve in loop:
+            pts.extend((p.X, p.Y) for p in list(curve.Tessellate())[:-1])
+        outlines.append(poly.to_xy(pts))
+    # the outer loop encloses the others
+    return max(outlines, key=lambda xy: abs(poly.area(xy)))
+
+
+def stacking_index(elements, tol=10 / 304.8):
+    # poly.OutlineIndex of the plan outlines of elements (units, masses), keyed by element id value
+    # groups() gives the elements with identical outlines, stacks() those repeated in the same position
+    index = poly.OutlineIndex(tol)
+    for element in elements:
+        xy = plan_outline(element)
+        if xy:
+            index.add(element.Id.IntegerValue, xy)
+    return index
+
+
+def polygon_loop(xy, z=0):
+    # closed CurveLoop through the points of a flat xy array at elevation z
+    pts = [DB.XYZ(x, y, z) for x, y in poly.to_points(xy)]
+    lines = [DB.Line.CreateBound(pts[i - 1], pts[i]) for i in range(1, len(pts))]
+    lines.append(DB.Line.CreateBound(pts[-1], pts[0]))
+    return DB.CurveLoop.Create(List[DB.Curve](lines))
+
+
+def rectangle_loop(corners, z=0):
+    # closed CurveLoop through 4 plan corners at elevation z
+    pts = [DB.XYZ(x, y, z) for x, y in corners]
+    lines = [DB.Line.CreateBound(pts[i], pts[(i + 1) % 4]) for i in range(4)]
+    return DB.CurveLoop.Create(List[DB.Curve](lines))
+
+
+def room_bb_outlines(room, angle=None, min_area=False):
     # get the outlines of a room's bounding box, rotated
-    rotation = DB.Transform.CreateRotationAtPoint(DB.XYZ.BasisZ, angle, room.Location.Point)
-    rotated_crop_loop = get_aligned_crop(room.ClosedShell, rotation.Inverse)
-    return rotated_crop_loop
+    # computed from the boundary polygon, no shell transform or regeneration needed
+    # min_area: use the minimum-area rectangle instead of the one aligned with the room's walls
+    loops = boundary.get_loops(room)
+    if not loops:
+        return None
+    pts = room_plan_points(room)
+    if min_area:
+        corners, angle = poly.min_area_rectangle(pts)
+    else:
+        if angle == None:
+            angle = room_rotation_angle(room)
+        corners = poly.rectangle_at_angle(pts, angle)
+    return rectangle_loop(corners, loops[0][0].start[2])
+
+
+def rooms_bb_outlines(rooms, min_area=False):
+    # crop loops for many rooms, in the same order; None for unplaced rooms
+    return [room_bb_outlines(room, min_area=min_area) for room in rooms]
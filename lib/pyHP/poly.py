@@ -0,0 +1,907 @@
+"""Planar geometry on plain coordinate tuples, no Revit API required
+Runs the same under IronPython and CPython
+
+Polygons are stored as compact flat coordinate arrays, xy = [x0, y0, x1, y1, ...],
+implicitly closed (the first point is not repeated). to_xy / to_points convert from and to
+lists of (x, y) tuples."""
+
+import math
+from array import array
+from pyHP import spatial
+
+
+QUARTER = 0.5 * math.pi
+
+
+def fold_quarter(angle):
+    # fold an angle into the (-45, 45] degree range, modulo 90 degrees
+    folded = math.fmod(angle, QUARTER)
+    if folded > 0.5 * QUARTER:
+        folded -= QUARTER
+    elif folded <= -0.5 * QUARTER:
+        folded += QUARTER
+    return folded
+
+
+def orientation(segments, tol=math.radians(1)):
+    # dominant orientation of straight segments ((x, y, ...), (x, y, ...)), folded modulo 90 degrees
+    # segment directions are grouped in buckets of `tol` width, the heaviest group (by total length) wins
+    # and its length-weighted mean direction is returned, in radians within (-45, 45] degrees
+    # rotating the segments by minus the result aligns the dominant group with the X and Y axes
+    slots = max(1, int(round(QUARTER / tol)))
+    buckets = {}
+    for seg in segments:
+        dx = seg[1][0] - seg[0][0]
+        dy = seg[1][1] - seg[0][1]
+        length = math.hypot(dx, dy)
+        if not length:
+            continue
+        # 4 * angle turns the 90 degree symmetry into a full turn, so directions average on a circle
+        theta = 4 * math.atan2(dy, dx)
+        key = int(round((math.atan2(dy, dx) % QUARTER) / tol)) % slots
+        bucket = buckets.setdefault(key, [0.0, 0.0, 0.0])
+        bucket[0] += length
+        bucket[1] += length * math.cos(theta)
+        bucket[2] += length * math.sin(theta)
+    if not buckets:
+        return 0.0
+    best = max(buckets, key=lambda k: buckets[k][0])
+    # merge the neighbouring buckets, a direction close to a bucket edge may fall on either side
+    cos_sum = 0.0
+    sin_sum = 0.0
+    for key in set([(best - 1) % slots, best, (best + 1) % slots]):
+        if key in buckets:
+            cos_sum += buckets[key][1]
+            sin_sum += buckets[key][2]
+    return fold_quarter(0.25 * math.atan2(sin_sum, cos_sum))
+
+
+def orientations(segment_lists, tol=math.radians(1)):
+    # orientation of many segment lists at once
+    return [orientation(segments, tol) for segments in segment_lists]
+
+
+def unique_axes(axes, tol, angle_step=1e-6):
+    # axes: (point, direction) pairs in plan; returns the indices of the axes to keep
+    # an axis is dropped when its point lies within tol of the line of an earlier kept axis, whatever
+    # that axis' direction, so the first of each group of collinear lines wins (as get_unique_borders)
+    # kept axes are held in a dict keyed on (direction angle, offset), quantised by angle_step and tol;
+    # the offset is the signed distance of the line from a reference point of its angle slot (the slot's
+    # first axis), so it stays local. A point is checked against every slot held, one per distinct
+    # direction in practice, probing the few offset cells its tolerance reaches
+    spread = 2 * math.sin(0.5 * angle_step)
+    refs = {}
+    lines = {}
+    kept = []
+    for index, axis in enumerate(axes):
+        pt, d = axis
+        length = math.hypot(d[0], d[1])
+        if not length:
+            continue
+        x, y = pt[0], pt[1]
+        duplicate = False
+        for a_key, (rx, ry, rux, ruy) in refs.items():
+            # offset at the reference point of the slot's lines through this point
+            dx, dy = rx - x, ry - y
+            off = rux * dy - ruy * dx
+            # directions within a slot differ by up to angle_step, which widens the window with the distance
+            window = tol + math.hypot(dx, dy) * spread
+            first, last = int(math.floor((off - window) / tol)), int(math.floor((off + window) / tol))
+            cells = lines[a_key]
+            if last - first >= len(cells):
+                found = [line for cell in cells.values() for line in cell]
+            else:
+                found = [line for cell in range(first, last + 1) for line in cells.get(cell, ())]
+            for px, py, vx, vy in found:
+                if abs(vx * (y - py) - vy * (x - px)) <= tol:
+                    duplicate = True
+                    break
+            if duplicate:
+                break
+        if duplicate:
+            continue
+        # direction folded to 0..180 degrees, so opposite lines share one slot
+        a = math.atan2(d[1], d[0]) % math.pi
+        ux, uy = math.cos(a), math.sin(a)
+        a_key = int(round(a / angle_step))
+        if a_key not in refs:
+            refs[a_key] = (x, y, ux, uy)
+            lines[a_key] = {}
+        rx, ry, rux, ruy = refs[a_key]
+        off = ux * (ry - y) - uy * (rx - x)
+        lines[a_key].setdefault(int(math.floor(off / tol)), []).append((x, y, ux, uy))
+        kept.append(index)
+    return kept
+
+
+def arc_points(start, end, mid, tol=0.003):
+    # discretise the arc through start, mid and end into plan points, chord error below tol
+    # returns the points from start to end inclusive
+    ax, ay = start[0], start[1]
+    bx, by = mid[0], mid[1]
+    cx, cy = end[0], end[1]
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-12:
+        return [(ax, ay), (cx, cy)]
+    a2 = ax * ax + ay * ay
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ox = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+    oy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+    radius = math.hypot(ax - ox, ay - oy)
+    t0 = math.atan2(ay - oy, ax - ox)
+    tm = (math.atan2(by - oy, bx - ox) - t0) % (2 * math.pi)
+    sweep = (math.atan2(cy - oy, cx - ox) - t0) % (2 * math.pi)
+    if tm > sweep:
+        # the arc runs clockwise
+        sweep -= 2 * math.pi
+    if tol >= radius:
+        step = QUARTER
+    else:
+        step = 2 * math.acos(1 - tol / radius)
+    n = max(2, int(math.ceil(abs(sweep) / step)))
+    pts = [(ox + radius * math.cos(t0 + sweep * i / n), oy + radius * math.sin(t0 + sweep * i / n))
+           for i in range(n)]
+    pts.append((cx, cy))
+    return pts
+
+
+def loop_points(segments, tol=0.003):
+    # plan points of a closed loop of (start, end, mid, is_arc) segments, arcs discretised
+    pts = []
+    for seg in segments:
+        if seg[3]:
+            pts.extend(arc_points(seg[0], seg[1], seg[2], tol)[:-1])
+        else:
+            pts.append((seg[0][0], seg[0][1]))
+    return pts
+
+
+def convex_hull(points):
+    # counter-clockwise convex hull of plan points (monotone chain)
+    pts = sorted(set((p[0], p[1]) for p in points))
+    if len(pts) < 3:
+        return pts
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+
+def _extents(points, c, s):
+    # min/max of points projected on the axes rotated by the angle with cosine c and sine s
+    us = [x * c + y * s for x, y in points]
+    vs = [y * c - x * s for x, y in points]
+    return min(us), min(vs), max(us), max(vs)
+
+
+def _rectangle(extents, c, s):
+    u0, v0, u1, v1 = extents
+    return [(u * c - v * s, u * s + v * c) for u, v in ((u0, v0), (u1, v0), (u1, v1), (u0, v1))]
+
+
+def rectangle_at_angle(points, angle):
+    # bounding rectangle of plan points with its sides along angle, corners counter-clockwise
+    pts = [(p[0], p[1]) for p in points]
+    c, s = math.cos(angle), math.sin(angle)
+    return _rectangle(_extents(pts, c, s), c, s)
+
+
+def min_area_rectangle(points):
+    # minimum-area bounding rectangle of plan points, returns (corners, angle)
+    # the optimal rectangle has a side on a convex hull edge, so only those directions are tried
+    hull = convex_hull(points)
+    if len(hull) < 3:
+        return rectangle_at_angle(hull, 0.0), 0.0
+    best = None
+    for i in range(len(hull)):
+        p, q = hull[i - 1], hull[i]
+        angle = fold_quarter(math.atan2(q[1] - p[1], q[0] - p[0]))
+        c, s = math.cos(angle), math.sin(angle)
+        ext = _extents(hull, c, s)
+        area = (ext[2] - ext[0]) * (ext[3] - ext[1])
+        if best is None or area < best[0]:
+            best = (area, ext, c, s, angle)
+    area, ext, c, s, angle = best
+    return _rectangle(ext, c, s), angle
+
+
+def extents_at_angle(points, angle, origin=(0.0, 0.0)):
+    # (min x, min y, max x, max y) of plan points after rotating them by -angle about origin
+    ox, oy = origin[0], origin[1]
+    c, s = math.cos(angle), math.sin(angle)
+    u0, v0, u1, v1 = _extents([(p[0] - ox, p[1] - oy) for p in points], c, s)
+    return u0 + ox, v0 + oy, u1 + ox, v1 + oy
+
+
+def to_xy(points):
+    # pack plan points into a flat array('d') of x, y coordinates
+    xy = array('d')
+    for p in points:
+        xy.append(p[0])
+        xy.append(p[1])
+    return xy
+
+
+def to_points(xy):
+    # unpack a flat coordinate array into (x, y) tuples
+    return [(xy[i], xy[i + 1]) for i in range(0, len(xy), 2)]
+
+
+def loop_xy(segments, tol=0.003):
+    # flat coordinate array of a closed loop of (start, end, mid, is_arc) segments, arcs discretised
+    return to_xy(loop_points(segments, tol))
+
+
+def area(xy):
+    # signed area (shoelace), positive for counter-clockwise polygons
+    n = len(xy)
+    if n < 6:
+        return 0.0
+    total = 0.0
+    px, py = xy[n - 2], xy[n - 1]
+    for i in range(0, n, 2):
+        x, y = xy[i], xy[i + 1]
+        total += px * y - x * py
+        px, py = x, y
+    return 0.5 * total
+
+
+def winding(xy):
+    # 1 for counter-clockwise, -1 for clockwise, 0 for degenerate polygons
+    a = area(xy)
+    if a > 0:
+        return 1
+    if a < 0:
+        return -1
+    return 0
+
+
+def centroid(xy):
+    # area centroid; the mean of the vertices for degenerate polygons
+    n = len(xy)
+    if not n:
+        return None
+    cx = cy = total = 0.0
+    px, py = xy[n - 2], xy[n - 1]
+    for i in range(0, n, 2):
+        x, y = xy[i], xy[i + 1]
+        cross = px * y - x * py
+        total += cross
+        cx += (px + x) * cross
+        cy += (py + y) * cross
+        px, py = x, y
+    if abs(total) < 1e-12:
+        count = n // 2
+        return sum(xy[0::2]) / count, sum(xy[1::2]) / count
+    return cx / (3 * total), cy / (3 * total)
+
+
+def bounding_box(xy):
+    # (min x, min y, max x, max y)
+    xs = xy[0::2]
+    ys = xy[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def perimeter(xy):
+    n = len(xy)
+    if n < 4:
+        return 0.0
+    total = 0.0
+    px, py = xy[n - 2], xy[n - 1]
+    for i in range(0, n, 2):
+        x, y = xy[i], xy[i + 1]
+        total += math.hypot(x - px, y - py)
+        px, py = x, y
+    return total
+
+
+def contains(xy, x, y):
+    # point in polygon test (even-odd ray casting); points on the outline may go either way
+    inside = False
+    n = len(xy)
+    if n < 6:
+        return False
+    px, py = xy[n - 2], xy[n - 1]
+    for i in range(0, n, 2):
+        qx, qy = xy[i], xy[i + 1]
+        if (qy > y) != (py > y) and x < (px - qx) * (y - qy) / (py - qy) + qx:
+            inside = not inside
+        px, py = qx, qy
+    return inside
+
+
+def contains_loops(loops, x, y):
+    # point in a polygon with holes: loops[0] is the outer boundary, the other loops are holes
+    if not loops or not contains(loops[0], x, y):
+        return False
+    for hole in loops[1:]:
+        if contains(hole, x, y):
+            return False
+    return True
+
+
+class PolygonIndex:
+    '''Point location over many polygons, through a uniform grid of their bounding boxes
+    Built once from (key, loops) pairs, loops being flat xy arrays with the outer boundary first.
+    A query only tests the few polygons registered in the point's grid cell'''
+    def __init__(self, items, cell=None):
+        self.entries = []
+        for key, loops in items:
+            if loops and len(loops[0]) >= 6:
+                self.entries.append((key, loops, bounding_box(loops[0])))
+        if cell is None:
+            # the mean polygon size keeps both the cells per polygon and the polygons per cell small
+            sizes = [max(x1 - x0, y1 - y0) for key, loops, (x0, y0, x1, y1) in self.entries]
+            cell = sum(sizes) / len(sizes) if sizes and sum(sizes) else 1.0
+        self.cell = cell
+        self.cells = {}
+        for n, (key, loops, (x0, y0, x1, y1)) in enumerate(self.entries):
+            for i in range(int(math.floor(x0 / cell)), int(math.floor(x1 / cell)) + 1):
+                for j in range(int(math.floor(y0 / cell)), int(math.floor(y1 / cell)) + 1):
+                    self.cells.setdefault((i, j), []).append(n)
+
+    def _containing(self, x, y):
+        # keys of the polygons containing (x, y), in build order
+        cell = self.cell
+        for n in self.cells.get((int(math.floor(x / cell)), int(math.floor(y / cell))), ()):
+            key, loops, (x0, y0, x1, y1) = self.entries[n]
+            if x0 <= x <= x1 and y0 <= y <= y1 and contains_loops(loops, x, y):
+                yield key
+
+    def locate(self, x, y):
+        # key of the first polygon containing (x, y), None outside all polygons
+        for key in self._containing(x, y):
+            return key
+        return None
+
+    def locate_all(self, x, y):
+        # keys of all polygons containing (x, y), for overlapping polygons
+        return list(self._containing(x, y))
+
+    def locate_many(self, points):
+        # keys for a batch of (x, y, ...) points, None where a point is outside all polygons
+        locate = self.locate
+        return [locate(p[0], p[1]) for p in points]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def offset(xy, distance, miter_limit=4.0):
+    # offset a simple polygon outwards by distance (inwards when negative), keeping its winding
+    # corners are mitred; corners pointing away from the polygon whose mitre would be longer than
+    # miter_limit * distance are bevelled with two points at distance from the corner instead
+    n = len(xy) // 2
+    if n < 3:
+        return array('d', xy)
+    sign = 1 if area(xy) >= 0 else -1
+    normals = []
+    for i in range(n):
+        x0, y0 = xy[2 * i], xy[2 * i + 1]
+        x1, y1 = xy[(2 * i + 2) % (2 * n)], xy[(2 * i + 3) % (2 * n)]
+        length = math.hypot(x1 - x0, y1 - y0) or 1.0
+        # outward normal of the edge from vertex i to i + 1
+        normals.append((sign * (y1 - y0) / length, sign * (x0 - x1) / length))
+    out = array('d')
+    for i in range(n):
+        x, y = xy[2 * i], xy[2 * i + 1]
+        ax, ay = normals[i - 1]
+        bx, by = normals[i]
+        denom = 1.0 + ax * bx + ay * by
+        # the corner points away from the offset side when it is convex and the offset grows,
+        # or reflex and it shrinks; only then can the mitre be cut off
+        outer = sign * (ax * by - ay * bx) * distance >= 0
+        # the mitre point is (a + b) / (1 + a.b) * distance, of length sqrt(2 / (1 + a.b)) * distance
+        if outer and (denom < 1e-9 or 2.0 / denom > miter_limit * miter_limit):
+            out.extend((x + distance * ax, y + distance * ay, x + distance * bx, y + distance * by))
+        elif denom < 1e-9:
+            # a full turn back into the offset side, push the vertex along the edge normal
+            out.extend((x + distance * bx, y + distance * by))
+        else:
+            out.extend((x + distance * (ax + bx) / denom, y + distance * (ay + by) / denom))
+    return out
+
+
+def _mid3(a, b):
+    return tuple(0.5 * (a[i] + b[i]) for i in range(len(a)))
+
+
+def _line_length(a, b):
+    return math.hypot(b[0] - a[0], b[1] - a[1])
+
+
+def _chord_distance(p, a, b):
+    # plan distance of p from the chord a-b
+    length = _line_length(a, b)
+    if not length:
+        return _line_length(a, p)
+    return abs((b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0])) / length
+
+
+def _record(template, start, end, mid, is_arc):
+    # build a segment of the same type as template (plain tuple or namedtuple)
+    if hasattr(template, "_make"):
+        return template._make((start, end, mid, is_arc))
+    return (start, end, mid, is_arc)
+
+
+def simplify_loop(segments, tol=0.003):
+    # simplify a closed loop of (start, end, mid, is_arc) segments
+    # straight segments shorter than tol are absorbed by a straight neighbour, then runs of
+    # consecutive lines whose vertices all lie within tol of the run's chord are merged into one line
+    # segment ends shared with the rest of the loop are kept, so the loop stays closed
+    # returns (segments, number of segments removed)
+    loop = [[s[0], s[1], s[2], s[3]] for s in segments]
+    template = segments[0] if segments else None
+    original = len(loop)
+
+    # 1. slivers
+    i = 0
+    while i < len(loop) and len(loop) > 3:
+        seg = loop[i]
+        if seg[3] or _line_length(seg[0], seg[1]) >= tol:
+            i += 1
+            continue
+        prev, nxt = loop[i - 1], loop[(i + 1) % len(loop)]
+        if not nxt[3]:
+            nxt[0] = seg[0]
+            nxt[2] = _mid3(nxt[0], nxt[1])
+        elif not prev[3]:
+            prev[1] = seg[1]
+            prev[2] = _mid3(prev[0], prev[1])
+        else:
+            i += 1
+            continue
+        del loop[i]
+
+    # 2. collinear runs
+    def mergeable(run, seg):
+        # seg continues the run of lines without turning back and every vertex stays near the chord
+        if seg[3] or run[0][3]:
+            return False
+        a, b = run[0][0], seg[1]
+        da = (run[0][1][0] - run[0][0][0], run[0][1][1] - run[0][0][1])
+        db = (seg[1][0] - seg[0][0], seg[1][1] - seg[0][1])
+        if da[0] * db[0] + da[1] * db[1] <= 0:
+            return False
+        return all(_chord_distance(s[1], a, b) <= tol for s in run)
+
+    merged = []
+    run = None
+    for seg in loop:
+        if run and mergeable(run, seg):
+            run.append(seg)
+            continue
+        if run:
+            merged.append(run)
+        run = [seg]
+    if run:
+        merged.append(run)
+    # the loop may start in the middle of a run
+    if len(merged) > 1:
+        tail = merged[-1]
+        joined = list(tail)
+        for seg in merged[0]:
+            if not mergeable(joined, seg):
+                break
+            joined.append(seg)
+        else:
+            merged = [joined] + merged[1:-1]
+    if len(merged) < 3:
+        merged = [[seg] for seg in loop]
+
+    result = []
+    for run in merged:
+        if len(run) == 1:
+            seg = run[0]
+            result.append(_record(template, seg[0], seg[1], seg[2], seg[3]))
+        else:
+            start, end = run[0][0], run[-1][1]
+            result.append(_record(template, start, end, _mid3(start, end), False))
+    return result, original - len(result)
+
+
+def heal_loop(segments, tol=0.003, gap_tol=None):
+    # repair a boundary loop of (start, end, mid, is_arc) segments before extrusion:
+    # - endpoints within tol are snapped together
+    # - zero-length lines are removed
+    # - duplicated segments, and pairs running back and forth over the same points, are removed
+    # - open ends closer than gap_tol (10 x tol by default) are bridged with a line
+    # the segments are then chained into loop order, reversing segments where needed
+    # returns (segments, actions), actions counts each repair plus the open ends left
+    if gap_tol is None:
+        gap_tol = 10 * tol
+    actions = {"snapped": 0, "zero_length": 0, "overlaps": 0, "gaps_closed": 0, "open_ends": 0}
+    template = segments[0] if segments else None
+    loop = [[s[0], s[1], s[2], s[3]] for s in segments]
+
+    # 1. snap endpoints to the first endpoint seen within tolerance
+    grid = spatial.PointGrid(tol)
+    for seg in loop:
+        moved = False
+        for i in (0, 1):
+            match = grid.find(seg[i])
+            if match is None:
+                grid.add(seg[i])
+            elif tuple(match) != tuple(seg[i]):
+                # endpoints that only differ by float noise are unified without counting as a repair
+                if math.sqrt(sum((m - p) ** 2 for m, p in zip(match, seg[i]))) > 1e-9:
+                    actions["snapped"] += 1
+                seg[i] = match
+                moved = True
+        if moved and not seg[3]:
+            seg[2] = _mid3(seg[0], seg[1])
+
+    # 2. zero-length lines
+    kept = [seg for seg in loop if seg[3] or tuple(seg[0]) != tuple(seg[1])]
+    actions["zero_length"] = len(loop) - len(kept)
+    loop = kept
+
+    # 3. overlapping lines: a repeat of the same line is dropped, a line and its reverse cancel out
+    seen = {}
+    for index, seg in enumerate(loop):
+        if seg[3]:
+            continue
+        key = frozenset([tuple(seg[0]), tuple(seg[1])])
+        seen.setdefault(key, []).append(index)
+    dropped = set()
+    for indices in seen.values():
+        if len(indices) < 2:
+            continue
+        first = loop[indices[0]]
+        forward = [i for i in indices if tuple(loop[i][0]) == tuple(first[0])]
+        backward = [i for i in indices if i not in forward]
+        pairs = min(len(forward), len(backward))
+        # back and forth pairs cancel out, then keep a single copy of what is left
+        dropped.update(forward[:pairs] + backward[:pairs])
+        rest = forward[pairs:] + backward[pairs:]
+        dropped.update(rest[1:])
+    actions["overlaps"] = len(dropped)
+    loop = [seg for index, seg in enumerate(loop) if index not in dropped]
+
+    # 4. bridge small gaps between the open ends, nearest pairs first
+    ends = spatial.open_ends([(seg[0], seg[1]) for seg in loop], tol)
+    pairs = []
+    for i in range(len(ends)):
+        for j in range(i + 1, len(ends)):
+            d = _line_length(ends[i], ends[j])
+            if d <= gap_tol:
+                pairs.append((d, i, j))
+    used = set()
+    for d, i, j in sorted(pairs):
+        if i in used or j in used:
+            continue
+        used.update((i, j))
+        loop.append([ends[i], ends[j], _mid3(ends[i], ends[j]), False])
+        actions["gaps_closed"] += 1
+    actions["open_ends"] = len(ends) - len(used)
+
+    # 5. chain into loop order
+    loop = _chain(loop)
+    return [_record(template, seg[0], seg[1], seg[2], seg[3]) for seg in loop], actions
+
+
+def _chain(loop):
+    # order segments so each one starts where the previous one ends, flipping them where needed
+    # segments that cannot be chained are appended at the end in their original order
+    if not loop:
+        return loop
+    by_point = {}
+    for index, seg in enumerate(loop):
+        by_point.setdefault(tuple(seg[0]), []).append(index)
+        by_point.setdefault(tuple(seg[1]), []).append(index)
+    used = set([0])
+    ordered = [loop[0]]
+    current = tuple(loop[0][1])
+    while len(ordered) < len(loop):
+        candidates = [i for i in by_point.get(current, ()) if i not in used]
+        if not candidates:
+            break
+        index = candidates[0]
+        seg = loop[index]
+        if tuple(seg[0]) != current:
+            seg = [seg[1], seg[0], seg[2], seg[3]]
+        used.add(index)
+        ordered.append(seg)
+        current = tuple(seg[1])
+    ordered.extend(seg for index, seg in enumerate(loop) if index not in used)
+    return ordered
+
+
+def _oriented(xy, ccw=True):
+    # copy of a polygon with counter-clockwise (or clockwise) winding
+    if (area(xy) >= 0) == ccw:
+        return array('d', xy)
+    pts = to_points(xy)
+    pts.reverse()
+    return to_xy(pts)
+
+
+def _drop_collinear(pts, tol=0.003):
+    # remove repeated vertices and vertices within tol of the line through their neighbours
+    pts = list(pts)
+    changed = True
+    while changed and len(pts) > 3:
+        changed = False
+        for i in range(len(pts) - 1, -1, -1):
+            if len(pts) <= 3:
+                break
+            a, p, b = pts[i - 1], pts[i], pts[(i + 1) % len(pts)]
+            between = (p[0] - a[0]) * (b[0] - p[0]) + (p[1] - a[1]) * (b[1] - p[1]) >= 0
+            if p == a or (between and _chord_distance(p, a, b) <= tol):
+                del pts[i]
+                changed = True
+    return pts
+
+
+def _on_segment(p, a, b, tol):
+    # p lies within tol of the inside of segment a-b (not on its ends)
+    if p == a or p == b:
+        return False
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    if not length_sq:
+        return False
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_sq
+    return 0 < t < 1 and _chord_distance(p, a, b) <= tol
+
+
+def _split_pair(e, f, split_e, split_f, tol, snap):
+    # record the points where edges e and f touch or cross on both edges
+    (a, b), (c, d) = e[:2], f[:2]
+    if max(a[1], b[1]) < min(c[1], d[1]) - tol or max(c[1], d[1]) < min(a[1], b[1]) - tol:
+        return
+    touching = False
+    for p in (c, d):
+        if _on_segment(p, a, b, tol):
+            split_e.append(p)
+            touching = True
+    for p in (a, b):
+        if _on_segment(p, c, d, tol):
+            split_f.append(p)
+            touching = True
+    if touching or a in (c, d) or b in (c, d):
+        # the edges meet at an end, a crossing found next to it would only cut a sliver
+        return
+    rx, ry = b[0] - a[0], b[1] - a[1]
+    sx, sy = d[0] - c[0], d[1] - c[1]
+    denom = rx * sy - ry * sx
+    if abs(denom) < 1e-12:
+        return
+    t = ((c[0] - a[0]) * sy - (c[1] - a[1]) * sx) / denom
+    u = ((c[0] - a[0]) * ry - (c[1] - a[1]) * rx) / denom
+    if 0 < t < 1 and 0 < u < 1:
+        p = snap((a[0] + t * rx, a[1] + t * ry))
+        split_e.append(p)
+        split_f.append(p)
+
+
+def _rightmost(prev, current, candidates):
+    # the candidate turning furthest right when arriving at current from prev
+    ix, iy = current[0] - prev[0], current[1] - prev[1]
+    def turn(p):
+        ox, oy = p[0] - current[0], p[1] - current[1]
+        return math.atan2(ix * oy - iy * ox, ix * ox + iy * oy)
+    return min(candidates, key=turn)
+
+
+def union(polygons, tol=0.003):
+    # union of polygons, each a list of flat xy loops (outer boundary first, then holes)
+    # vertices within tol are snapped together and edges are split where they cross or touch,
+    # the edge pieces on the outline of the union are then chained into loops
+    # returns a list of polygons [outer, hole, ...], largest first
+    grid = spatial.PointGrid(tol)
+
+    def snap(pt):
+        found = grid.find(pt)
+        if found is None:
+            grid.add(pt)
+            return pt
+        return found
+
+    # 1. snapped, oriented loops (outer boundaries counter-clockwise, holes clockwise) and their edges
+    shapes = []
+    edges = []
+    for loops in polygons:
+        if not loops or abs(area(loops[0])) <= tol * tol:
+            continue
+        owner = len(shapes)
+        shape = []
+        for n, xy in enumerate(loops):
+            pts = [snap(p) for p in to_points(_oriented(xy, n == 0))]
+            shape.append(to_xy(pts))
+            for i in range(len(pts)):
+                if pts[i - 1] != pts[i]:
+                    edges.append((pts[i - 1], pts[i], owner))
+        shapes.append(shape)
+
+    # 2. split edges of different polygons where they meet, sweeping along X
+    splits = [[] for e in edges]
+    active = []
+    for i in sorted(range(len(edges)), key=lambda i: min(edges[i][0][0], edges[i][1][0])):
+        a, b, owner = edges[i]
+        x0 = min(a[0], b[0]) - tol
+        active = [j for j in active if max(edges[j][0][0], edges[j][1][0]) >= x0]
+        for j in active:
+            if edges[j][2] != owner:
+                _split_pair(edges[i], edges[j], splits[i], splits[j], tol, snap)
+        active.append(i)
+    pieces = []
+    for (a, b, owner), points in zip(edges, splits):
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        prev = a
+        for p in sorted(set(points), key=lambda p: (p[0] - a[0]) * dx + (p[1] - a[1]) * dy) + [b]:
+            if p != prev:
+                pieces.append((prev, p, owner))
+                prev = p
+
+    # 3. keep the pieces on the outline: not shared with an opposite piece, not inside another polygon
+    directed = {}
+    for a, b, owner in pieces:
+        directed.setdefault((a, b), set()).add(owner)
+    index = PolygonIndex(enumerate(shapes))
+    outgoing = {}
+    for a, b, owner in pieces:
+        if (b, a) in directed or b in outgoing.get(a, ()):
+            continue
+        owners = directed[(a, b)]
+        if any(k not in owners for k in index.locate_all(0.5 * (a[0] + b[0]), 0.5 * (a[1] + b[1]))):
+            continue
+        outgoing.setdefault(a, []).append(b)
+
+    # 4. chain the pieces into loops, splitting at vertices where the outline touches itself
+    outers = []
+    holes = []
+    for start in list(outgoing):
+        while outgoing[start]:
+            loop = [start]
+            prev, current = start, outgoing[start].pop()
+            while current != start:
+                loop.append(current)
+                candidates = outgoing.get(current)
+                if not candidates:
+                    break
+                following = _rightmost(prev, current, candidates)
+                candidates.remove(following)
+                prev, current = current, following
+            else:
+                xy = to_xy(_drop_collinear(loop, tol))
+                signed = area(xy)
+                if signed > tol * tol:
+                    outers.append([xy])
+                elif signed < -tol * tol:
+                    holes.append(xy)
+
+    # 5. each hole goes to the smallest outer boundary around it
+    outers.sort(key=lambda loops: area(loops[0]))
+    for hole in holes:
+        for x, y in to_points(hole):
+            around = [loops for loops in outers if contains(loops[0], x, y)]
+            if around:
+                around[0].append(hole)
+                break
+    outers.reverse()
+    return outers
+
+
+def _size(xy):
+    # width and height of a polygon's bounding box
+    x0, y0, x1, y1 = bounding_box(xy)
+    return x1 - x0, y1 - y0
+
+
+def merge_outlines(polygons, gap=0.0, tol=0.003):
+    # union of polygons lying up to gap apart, e.g. the rooms of a flat separated by internal walls
+    # every polygon grows by half the gap, the union closes the gaps and shrinks back by the same amount
+    if not gap:
+        return union(polygons, tol)
+    half = 0.5 * gap
+    grown = []
+    for loops in polygons:
+        if not loops:
+            continue
+        holes = [offset(xy, -half) for xy in loops[1:] if min(_size(xy)) > gap]
+        grown.append([offset(loops[0], half)] + holes)
+    return [[offset(merged[0], -half)] + [offset(xy, half) for xy in merged[1:]]
+            for merged in union(grown, tol)]
+
+
+def normalized_outline(xy, tol=0.003):
+    # outline points without collinear vertices, counter-clockwise, relative to the centroid
+    # returns (points, centroid); two outlines equal up to translation normalise to the same points
+    cx, cy = centroid(xy)
+    pts = _drop_collinear(to_points(_oriented(xy)), tol)
+    return [(x - cx, y - cy) for x, y in pts], (cx, cy)
+
+
+def _same_outline(a, b, tol):
+    # b matches a vertex by vertex within tol, starting anywhere along b
+    n = len(a)
+    if len(b) != n:
+        return False
+    tol_sq = tol * tol
+    ax, ay = a[0]
+    for shift in range(n):
+        if (b[shift][0] - ax) ** 2 + (b[shift][1] - ay) ** 2 > tol_sq:
+            continue
+        for i in range(1, n):
+            p, q = a[i], b[(i + shift) % n]
+            if (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 > tol_sq:
+                break
+        else:
+            return True
+    return False
+
+
+class OutlineIndex:
+    '''Groups of outlines that are identical up to translation, within tolerance
+    Outlines are normalised about their centroid and hashed by vertex count and size, so each new
+    outline is only compared with the few groups in its neighbouring buckets, not with every other one'''
+    def __init__(self, tol=0.01):
+        self.tol = tol
+        self.size = 2 * tol
+        self.buckets = {}
+        self.shapes = []
+        self.members = []
+        self.centroids = {}
+
+    def _bucket(self, pts):
+        xs = [p[0] for p in pts]
+        ys = [p[1] for p in pts]
+        return (len(pts), int(math.floor((max(xs) - min(xs)) / self.size)),
+                int(math.floor((max(ys) - min(ys)) / self.size)))
+
+    def add(self, key, xy):
+        # file an outline (flat xy array) under key, returns the index of its group
+        pts, center = normalized_outline(xy, self.tol)
+        self.centroids[key] = center
+        n, i, j = self._bucket(pts)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for group in self.buckets.get((n, i + di, j + dj), ()):
+                    if _same_outline(self.shapes[group], pts, self.tol):
+                        self.members[group].append(key)
+                        return group
+        group = len(self.shapes)
+        self.shapes.append(pts)
+        self.members.append([key])
+        self.buckets.setdefault((n, i, j), []).append(group)
+        return group
+
+    def groups(self):
+        # keys of each group of identical outlines, in the order the groups were found
+        return [list(keys) for keys in self.members]
+
+    def stacks(self, tol=None):
+        # keys of identical outlines that also sit at the same plan position, e.g. a unit repeated on every storey
+        if tol is None:
+            tol = self.tol
+        stacks = []
+        for keys in self.members:
+            grid = spatial.PointGrid(tol)
+            by_point = {}
+            for key in keys:
+                center = self.centroids[key]
+                found = grid.find(center)
+                if found is None:
+                    grid.add(center)
+                    found = center
+                by_point.setdefault(found, []).append(key)
+            stacks.extend(by_point.values())
+        return stacks
+
+    def __len__(self):
+        return len(self.centroids)
@@ -0,0 +1,45 @@
+"""Room shells (ClosedShell) and their bounding boxes, cached per room version"""
+
+from pyrevit import DB, HOST_APP
+from pyHP import cache, changes
+
+
+def open_document_keys():
+    return set(changes.doc_key(doc) for doc in HOST_APP.app.Documents)
+
+
+# keyed by document and room id, stamped with the room's version. Kept for the session where the stamps
+# outlast a run (Revit 2021+ element versions, or change tracking), otherwise for this run only
+if changes.versioned_elements() or changes.tracking():
+    shell_cache = changes.session_object("PYHP_SHELL_CACHE", lambda: cache.LRUCache("room shells", maxsize=512))
+    # release the Revit geometry of documents closed since the last run
+    open_keys = open_document_keys()
+    shell_cache.invalidate_where(lambda cached: cached[1] not in open_keys)
+else:
+    shell_cache = cache.LRUCache("room shells", maxsize=512)
+
+
+def get_shell(room):
+    # the room's ClosedShell, recomputed only when the room changed
+    key = ("shell", changes.doc_key(room.Document), room.Id.IntegerValue)
+    return shell_cache.get(key, lambda: room.ClosedShell, changes.element_stamp(room))
+
+
+def get_solids(room):
+    # solids of the room shell with a volume
+    shell = get_shell(room)
+    if not shell:
+        return []
+    return [geo for geo in shell if isinstance(geo, DB.Solid) and geo.Volume > 0.0]
+
+
+def get_bbox(room):
+    # ((min x, min y, min z), (max x, max y, max z)) of the room shell, None for unplaced or unbounded rooms
+    def load():
+        shell = get_shell(room)
+        bb = shell.GetBoundingBox() if shell else None
+        if bb is None:
+            return None
+        return (bb.Min.X, bb.Min.Y, bb.Min.Z), (bb.Max.X, bb.Max.Y, bb.Max.Z)
+    key = ("bbox", changes.doc_key(room.Document), room.Id.IntegerValue)
+    return shell_cache.get(key, load, changes.element_stamp(room))
@@ -0,0 +1,183 @@
+"""Spatial lookups on plain coordinate tuples, no Revit API required"""
+
+import math
+
+
+def _xyz(pt):
+    # accept (x, y) or (x, y, z) tuples
+    if len(pt) > 2:
+        return pt[0], pt[1], pt[2]
+    return pt[0], pt[1], 0.0
+
+
+class PointGrid:
+    '''Tolerance-aware spatial hash of points
+    Coordinates are snapped to cells eight times the tolerance wide, centred on multiples of the cell
+    size so points on round coordinates (z = 0) stay clear of the cell borders. A query first looks
+    for a point with the exact same coordinates, the usual case for chained boundary segments, then
+    in its own cell, and only probes the neighbouring cells its tolerance sphere reaches into'''
+    def __init__(self, tol=0.003):
+        self.tol = float(tol)
+        self.tol_sq = self.tol * self.tol
+        self.size = 8 * self.tol
+        self.inv = 1.0 / self.size
+        # fraction of a cell within tolerance of its border
+        self.margin = self.tol * self.inv
+        self.cells = {}
+        self.exact = {}
+        self.count = 0
+        self._order = 0
+
+    def cell(self, pt):
+        x, y, z = _xyz(pt)
+        inv = self.inv
+        return int(math.floor(x * inv + 0.5)), int(math.floor(y * inv + 0.5)), int(math.floor(z * inv + 0.5))
+
+    def add(self, pt):
+        xyz = _xyz(pt)
+        self._insert(self.cell(xyz), xyz, pt)
+
+    def _insert(self, key, xyz, pt):
+        # entries are (insertion order, x, y, z, point, cell key)
+        entry = (self._order, xyz[0], xyz[1], xyz[2], pt, key)
+        self.cells.setdefault(key, []).append(entry)
+        self.exact.setdefault(xyz, entry)
+        self._order += 1
+        self.count += 1
+
+    def find(self, pt):
+        # return the stored point matching pt within tolerance, or None
+        entry = self._locate(_xyz(pt))
+        if entry is not None:
+            return entry[4]
+        return None
+
+    def _locate(self, xyz):
+        # the stored entry matching xyz, or None
+        entry = self.exact.get(xyz)
+        if entry is not None:
+            return entry
+        x, y, z = xyz
+        inv = self.inv
+        fx, fy, fz = x * inv + 0.5, y * inv + 0.5, z * inv + 0.5
+        i, j, k = int(math.floor(fx)), int(math.floor(fy)), int(math.floor(fz))
+        cells = self.cells
+        tol_sq = self.tol_sq
+        for entry in cells.get((i, j, k), ()):
+            dx, dy, dz = entry[1] - x, entry[2] - y, entry[3] - z
+            if dx * dx + dy * dy + dz * dz <= tol_sq:
+                return entry
+        # the neighbours, only along the axes where the tolerance reaches past the cell border
+        margin = self.margin
+        steps = []
+        for f, n in ((fx, i), (fy, j), (fz, k)):
+            r = f - n
+            if r <= margin:
+                steps.append((n, n - 1))
+            elif r >= 1.0 - margin:
+                steps.append((n, n + 1))
+            else:
+                steps.append((n,))
+        for a in steps[0]:
+            for b in steps[1]:
+                for c in steps[2]:
+                    if a == i and b == j and c == k:
+                        continue
+                    for entry in cells.get((a, b, c), ()):
+                        dx, dy, dz = entry[1] - x, entry[2] - y, entry[3] - z
+                        if dx * dx + dy * dy + dz * dz <= tol_sq:
+                            return entry
+        return None
+
+    def remove(self, pt):
+        # remove a stored point (as returned by find)
+        for entry in self.cells[self.cell(pt)]:
+            if entry[4] is pt:
+                self._discard(entry)
+                return
+
+    def toggle(self, pt):
+        # remove the point matching pt if there is one, otherwise store pt
+        # returns True when a match was removed
+        xyz = _xyz(pt)
+        entry = self._locate(xyz)
+        if entry is not None:
+            self._discard(entry)
+            return True
+        self._insert(self.cell(xyz), xyz, pt)
+        return False
+
+    def _discard(self, entry):
+        key = entry[5]
+        bucket = self.cells[key]
+        bucket.remove(entry)
+        if not bucket:
+            del self.cells[key]
+        xyz = (entry[1], entry[2], entry[3])
+        if self.exact.get(xyz) is entry:
+            del self.exact[xyz]
+            # another point with the same coordinates takes over the exact entry
+            for other in bucket:
+                if (other[1], other[2], other[3]) == xyz:
+                    self.exact[xyz] = other
+                    break
+        self.count -= 1
+
+    def points(self):
+        # stored points in insertion order
+        entries = [entry for bucket in self.cells.values() for entry in bucket]
+        return [entry[4] for entry in sorted(entries, key=lambda e: e[0])]
+
+    def __len__(self):
+        return self.count
+
+
+# open ends kept in a plain list before open_ends moves them to a PointGrid
+SCAN_LIMIT = 8
+
+
+def open_ends(segments, tol=0.003):
+    # return the endpoints of a list of segments ((x, y, z), (x, y, z)) that are not matched
+    # by another endpoint within tolerance; an empty list means the segments form closed loops
+    # segments chained end to end leave one or two ends open at a time, a short list scanned directly
+    # is fastest for those; the grid takes over once more than SCAN_LIMIT ends are open
+    tol_sq = float(tol) * tol
+    ends = []
+    grid = None
+    for seg in segments:
+        for pt in (seg[0], seg[1]):
+            if grid is not None:
+                grid.toggle(pt)
+                continue
+            x, y = pt[0], pt[1]
+            z = pt[2] if len(pt) > 2 else 0.0
+            n = 0
+            for end in ends:
+                dx, dy, dz = end[0] - x, end[1] - y, end[2] - z
+                if dx * dx + dy * dy + dz * dz <= tol_sq:
+                    del ends[n]
+                    break
+                n += 1
+            else:
+                ends.append((x, y, z, pt))
+                if len(ends) > SCAN_LIMIT:
+                    grid = PointGrid(tol)
+                    for end in ends:
+                        grid.add(end[3])
+    if grid is not None:
+        return grid.points()
+    return [end[3] for end in ends]
+
+
+def open_ends_report(loops_by_key, tol=0.003):
+    # check many boundaries in one call
+    # loops_by_key: {key: [loop, ...]}, each loop a list of segments
+    # returns {key: [open end points]} for the keys that have open ends only
+    report = {}
+    for key, loops in loops_by_key.items():
+        ends = []
+        for loop in loops:
+            ends.extend(open_ends(loop, tol))
+        if ends:
+            report[key] = ends
+    return report
@@ -7,19 +7,15 @@ from collections import defaultdict
 import tempfile
 from pyrevit.revit.db import query
 from pyrevit.framework import List
+from pyHP import database
 
 output = script.get_output()
 close_other_output = output.close_others(all_open_outputs=True)
 
 
 def get_fam(some_name, category=DB.BuiltInCategory.OST_GenericModel):
-    # get family by given name
-    fam_name_filter = query.get_biparam_stringequals_filter({DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM: some_name})
-    found_fam = DB.FilteredElementCollector(revit.doc) \
-        .OfCategory(category) \
-        .WherePasses(fam_name_filter) \
-        .WhereElementIsNotElementType().ToElements()
-    return found_fam
+    # get the types of a family by given name, from the document's family registry
+    return database.family_registry(revit.doc).family_types(some_name, category)
 
 
 def convert_length_to_internal(from_units):
@@ -110,7 +106,7 @@ new_family_doc.SaveAs(fam_path, saveas_opt)
 # Load Family into project
 with revit.Transaction("Load Family", revit.doc):
     try:
-        loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+        loaded_f = database.family_registry(revit.doc).load(fam_path)
         revit.doc.Regenerate()
     except Exception as err:
         logger.error(err)
@@ -159,26 +155,25 @@ str_type = DB.Structure.StructuralType.NonStructural
 # Reload family and place it in the same position as the original element
 with revit.Transaction("Reload Family", revit.doc):
     try:
-        loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+        loaded_f = database.family_registry(revit.doc).load(fam_path)
         revit.doc.Regenerate()
     except Exception as err:
         logger.error(err)
-    # find family symbol and activate
-    fam_symbol = None
-    get_fam = DB.FilteredElementCollector(revit.doc).OfClass(DB.FamilySymbol).WhereElementIsElementType().ToElements()
+    # find family symbol of the loaded family and activate
+    fam_symbol = database.family_registry(revit.doc).any_type(fam_name, DB.BuiltInCategory.OST_GenericModel)
+    if fam_symbol:
+        fam_symbol.Name = fam_name
+        database.family_registry(revit.doc).update(fam_symbol)
 
-    for fam in get_fam:
-        type_name = fam.get_Parameter(DB.BuiltInParameter.SYMBOL_NAME_PARAM).AsString()
-        if str.strip(type_name) == fam_name:
-            fam_symbol = fam
-            fam_symbol.Name = fam_name
+        if not fam_symbol.IsActive:
+            fam_symbol.Activate()
+            revit.doc.Regenerate()
 
-            if not fam_symbol.IsActive:
-                fam_symbol.Activate()
-                revit.doc.Regenerate()
+        # place family symbol at position
+        new_fam_instance = revit.doc.Create.NewFamilyInstance(family_origin, fam_symbol, str_type)
 
-            # place family symbol at position
-            new_fam_instance = revit.doc.Create.NewFamilyInstance(family_origin, fam_symbol, str_type)
-
-print ("Created and placed family instance : {1} {0} ".format(output.linkify(new_fam_instance.Id), fam_name))
+if fam_symbol:
+    print ("Created and placed family instance : {1} {0} ".format(output.linkify(new_fam_instance.Id), fam_name))
+else:
+    forms.alert("Family {} was not found after loading it, no instance was placed.".format(fam_name), warn_icon=True)
 
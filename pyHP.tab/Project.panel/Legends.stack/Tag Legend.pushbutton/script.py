@@ -4,6 +4,7 @@ __doc__ = "Pick from a list of parameters to annotate legend components in a leg
 
 from itertools import izip
 from pyrevit import revit, DB, script, forms
+from pyHP import database
 
 # select all legend components in active view
 
@@ -50,16 +51,16 @@ for f, t in izip(fam_names, type_names):
 
     types_on_legend.append(collector)
 
-parameters_names_list = []
+# type parameters of each family on the legend, from the document's parameter catalog
+catalog = database.parameter_catalog(revit.doc)
+parameters_names = set()
 for t in types_on_legend:
+    # types without a category (or not found by name) have no catalog entry to offer
+    if t is None or t.Category is None:
+        continue
+    parameters_names.update(catalog.names(t.Category, instance=False, family=t.FamilyName))
 
-    element_parameter_set = t.Parameters
-    for p in element_parameter_set:
-        parameter_name = p.Definition.Name
-        if parameter_name not in parameters_names_list:
-            parameters_names_list.append(parameter_name)
-
-parameters_names_list.sort()
+parameters_names_list = sorted(parameters_names)
 selected_parameters = forms.SelectFromList.show(parameters_names_list,
                                                 button_name="Select Parameters",
                                                 multiselect = True)
@@ -2,11 +2,13 @@ import sys
 
 from pyrevit import revit, DB, forms
 from rpw.ui.forms import FlexForm, Label, TextBox, Button, ComboBox, CheckBox, Separator
+from pyHP import database
 
 
 masses = DB.FilteredElementCollector(revit.doc).OfCategory(DB.BuiltInCategory.OST_Mass).WhereElementIsNotElementType().ToElements()
 
-params = [p.Definition.Name for p in masses[0].Parameters if p.StorageType.ToString() == "String"]
+params = database.parameter_catalog(revit.doc).names(DB.BuiltInCategory.OST_Mass, instance=True, storage_type="String",
+                                                     editable=True)
 
 components = [
     Label("Select Mass parameter"),
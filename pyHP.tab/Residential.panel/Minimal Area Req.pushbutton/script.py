@@ -7,6 +7,7 @@ from pyrevit import revit, DB, forms, script
 import xlrd
 from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button)
 import sys
+from pyHP import database
 
 
 def first_digit_str(some_str):
@@ -53,13 +54,13 @@ discarded_rooms = count_grouped(enclosed_rooms)
 good_rooms = discard_grouped(enclosed_rooms)
 
 # query all available room parameters
-element_parameter_set = good_rooms[0].Parameters
+catalog = database.parameter_catalog(revit.doc)
 
 # pick which parameters to use
 ## prepare parameters for UI
-room_params = [p.Definition.Name for p in element_parameter_set if
-               p.StorageType.ToString() == "Double" and p.IsReadOnly == False and p.Definition.Name not in [
-                   "Limit Offset", "Base Offset"]]
+room_params = [name for name in catalog.names(DB.BuiltInCategory.OST_Rooms, instance=True, storage_type="Double",
+                                              editable=True)
+               if name not in ["Limit Offset", "Base Offset"]]
 
 if not room_params:
     forms.alert(msg="No suitable parameter",
@@ -123,9 +124,7 @@ cbd_var = ["CUPBOARD",
 
 # check there's a Unit Type parameter
 # gather and organize Room parameters: (only editable text params)
-room_parameter_set = good_rooms[0].Parameters
-room_params_text = [p.Definition.Name for p in room_parameter_set if
-                    p.StorageType.ToString() == "String" and p.IsReadOnly == False]
+room_params_text = catalog.names(DB.BuiltInCategory.OST_Rooms, instance=True, storage_type="String", editable=True)
 
 # forms.select_parameters(src_element=good_rooms[0], multiple = False, include_instance = True, include_type = False)
 
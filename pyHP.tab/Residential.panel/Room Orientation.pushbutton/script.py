@@ -5,6 +5,7 @@ from pyrevit import revit, DB, script, forms, HOST_APP
 from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button)
 import math
 from collections import Counter
+from pyHP import geo, database
 
 rooms = DB.FilteredElementCollector(revit.doc).OfCategory(DB.BuiltInCategory.OST_Rooms)
 windows = DB.FilteredElementCollector(revit.doc).OfCategory(DB.BuiltInCategory.OST_Windows).WhereElementIsNotElementType()
@@ -33,14 +34,21 @@ def rotate_vector(vector, angle):
     return rotated_vector
 
 
-def win_room (elem, phase):
+def win_room (elem, phase, locator=None):
     # get rooms for windows
     if elem.FromRoom[phase]:
         return elem.FromRoom[phase]
     elif elem.ToRoom[phase]:
         return elem.ToRoom[phase]
-    else:
-        return None
+    elif locator:
+        # no room reported by the window: probe both sides of its host wall
+        point = elem.Location.Point
+        depth = getattr(elem.Host, "Width", 0.0) / 2 + 0.5
+        for side in (1, -1):
+            room = locator.room_at(point + elem.FacingOrientation * side * depth, elem.LevelId)
+            if room:
+                return room
+    return None
 
 
 def get_orientation_by_normal(normal):
@@ -93,11 +101,8 @@ def win_orientation (window1):
 
 
 # UI - pick which parameter to populate, TODO: which phase to look at
-a_room = DB.FilteredElementCollector(revit.doc).OfCategory(
-    DB.BuiltInCategory.OST_Rooms).FirstElement()
-
-rm_parameter_set = a_room.Parameters
-rm_params_text = [p.Definition.Name for p in rm_parameter_set if p.StorageType.ToString() == "String" and p.Definition.VariesAcrossGroups]
+rm_params_text = database.parameter_catalog(revit.doc).names(DB.BuiltInCategory.OST_Rooms, instance=True,
+                                                             storage_type="String", varies_across_groups=True)
 
 # construct rwp UI
 components = [
@@ -111,8 +116,9 @@ chosen_room_param = form.values["rm_combobox1"]
 
 # collect orientation of windows by room
 orient_dict = {}
+locator = geo.room_locator(revit.doc, last_phase)
 for window in windows:
-    room = win_room(window, last_phase)
+    room = win_room(window, last_phase, locator)
     if room:
         orientation = win_orientation(window)
         if room.Id in orient_dict:
@@ -7,6 +7,7 @@ from Autodesk.Revit import Exceptions
 import tempfile
 import rpw
 from pyrevit.revit.db import query
+from pyHP import geo, database
 
 
 # selection filter for rooms
@@ -98,30 +99,13 @@ def preselection_with_filter(bic):
 
 
 def inverted_transform(element):
-    # get element location and return its inverted transform
-    # can be used to translate geometry to 0,0,0 origin to recreate geometry inside a family
-    el_location = element.Location.Point
-    bb = element.get_BoundingBox(revit.doc.ActiveView)
-    orig_cs = bb.Transform
-    # Creates a transform that represents a translation via the specified vector.
-    translated_cs = orig_cs.CreateTranslation(el_location)
-    # Transform from the room location point to origin
-    return translated_cs.Inverse
-
-
-def room_bound_to_origin(room, translation):
-    room_boundaries = DB.CurveArrArray()
-    # get room boundary segments
-    room_segments = room.GetBoundarySegments(DB.SpatialElementBoundaryOptions())
-    # iterate through loops of segments and add them to the array
-    for seg_loop in room_segments:
-        curve_array = DB.CurveArray()
-        for s in seg_loop:
-            old_curve = s.GetCurve()
-            new_curve = old_curve.CreateTransformed(translation)  # move curves to origin
-            curve_array.Append(new_curve)
-        room_boundaries.Append(curve_array)
-    return room_boundaries
+    # translation from the element location point to origin
+    return geo.inverted_transform(element)
+
+
+def room_bound_to_origin(room, translation, simplify_tol=None, report=None):
+    # boundaries are read through the pyHP boundary cache, optionally simplified
+    return geo.room_bound_to_origin(room, translation, simplify_tol, report)
 
 
 def get_ref_lvl_plane(family_doc):
@@ -131,20 +115,8 @@ def get_ref_lvl_plane(family_doc):
 
 
 def get_fam(family_name):
-    fam_bip_id = DB.ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM)
-    fam_bip_provider = DB.ParameterValueProvider(fam_bip_id)
-    if HOST_APP.is_newer_than(2022):
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name)
-    else:
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name, True)
-    fam_filter = DB.ElementParameterFilter(fam_filter_rule)
-
-    collector = DB.FilteredElementCollector(revit.doc) \
-        .WherePasses(fam_filter) \
-        .WhereElementIsElementType() \
-        .FirstElement()
-
-    return collector
+    # get any type of a family by family name, from the document's family registry
+    return database.family_registry(revit.doc).any_type(family_name)
 
 
 def get_family_slow_way(name):
@@ -160,13 +132,13 @@ def get_family_slow_way(name):
                 return el
 
 
-def room_to_extrusion(r, family_doc,output):
+def room_to_extrusion(r, family_doc, output, simplify_tol=None, report=None):
     # room_height = r.get_Parameter(DB.BuiltInParameter.ROOM_HEIGHT).AsDouble()
     room_height = convert_length_to_internal(2500)
     # helper: define inverted transform to translate room geometry to origin
     geo_translation = inverted_transform(r)
     # collect room boundaries and translate them to origin
-    room_boundaries = room_bound_to_origin(r, geo_translation)
+    room_boundaries = room_bound_to_origin(r, geo_translation, simplify_tol, report)
     # skip if the boundaries are not a closed loop (can happen with misaligned boundaries)
     if not room_boundaries:
         print("Extrusion failed for room {}. Try fixing room boundaries".format(output.linkify(r.Id)))
@@ -2,15 +2,21 @@ __title__ = "Room to\n Generic Model"
 __doc__ = "Transforms rooms into Generic Model families. Carries over unit parameters"
 
 from pyrevit import revit, DB, script, forms, HOST_APP
-from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button)
+from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button, CheckBox)
+from pyHP import boundary, geo, database
 import tempfile
 import helper
 import re
 import sys
+import os
+from timeit import default_timer as timer
 
 
 logger = script.get_logger()
 output = script.get_output()
+
+# optional: merge collinear boundary segments and drop slivers shorter than this before sketching (2 mm)
+SIMPLIFY_TOL = 2 / 304.8
 # get shared parameter for the extrusion material
 
 
@@ -90,12 +96,39 @@ if selection:
     #     sys.exit()
 
 
+    # boundary healing and simplification change the sketched geometry, so they are off unless asked for
+    components = [
+        Label("Snap endpoints, drop zero-length and overlapping segments"),
+        Label("and close small gaps in the room boundaries."),
+        CheckBox("heal", "Repair room boundaries", default=False),
+        Separator(),
+        Label("Merge collinear boundary segments and drop slivers"),
+        Label("shorter than {:.0f} mm before creating the extrusions.".format(SIMPLIFY_TOL * 304.8)),
+        CheckBox("simplify", "Simplify room boundaries", default=False),
+        Separator(),
+        Button("Create")]
+    form = FlexForm("Rooms to Generic Models", components)
+    if not form.show():
+        sys.exit()
+    simplify_tol = SIMPLIFY_TOL if form.values["simplify"] else None
+
+    # repair small boundary defects of all rooms up front, so the batch completes in one go
+    if form.values["heal"]:
+        heal_summary = geo.heal_rooms(selection)
+        for room_id, actions in heal_summary.items():
+            print("Room {}: {}".format(output.linkify(room_id), geo.describe_healing(actions)))
+
+    # boundary segments before and after simplification, per room
+    simplify_report = {}
+    # time spent building the extrusions from room boundaries, for the run summary
+    extrusion_time = 0.0
+    # family file sizes and load times of the placed families, for the run summary
+    total_size = 0
+    total_load_time = 0.0
+    placed = 0
+
     # iterate through rooms
     for room in selection:
-        # helper: define inverted transform to translate room geometry to origin
-        geo_translation = helper.inverted_transform(room)
-        # collect room boundaries and translate them to origin
-        room_boundaries = helper.room_bound_to_origin(room, geo_translation)
 
         # define new family doc
         try:
@@ -146,13 +179,15 @@ if selection:
 
         # Load Family into project
         with revit.Transaction("Load Family", revit.doc):
-            loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+            loaded_f = database.family_registry(revit.doc).load(fam_path)
             revit.doc.Regenerate()
 
         # Create extrusion from room boundaries
         with revit.Transaction(doc=new_family_doc, name="Create Extrusion"):
             try:
-                extrusion = helper.room_to_extrusion(room, new_family_doc,output)
+                extrusion_start = timer()
+                extrusion = helper.room_to_extrusion(room, new_family_doc, output, simplify_tol, simplify_report)
+                extrusion_time += timer() - extrusion_start
                 helper.assign_material_param(extrusion, sp_unit_material, new_family_doc)
                 placement_point = room.Location.Point
             except Exception as err:
@@ -184,11 +219,14 @@ if selection:
         save_opt = DB.SaveOptions()
         new_family_doc.Save(save_opt)
         new_family_doc.Close()
+        fam_size = os.path.getsize(fam_path)
 
         # Reload family with extrusion and place it in the same position as the room
         with revit.Transaction("Reload Family", revit.doc):
             try:
-                loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+                load_start = timer()
+                loaded_f = database.family_registry(revit.doc).load(fam_path)
+                load_time = timer() - load_start
                 # find family symbol and activate
                 fam_symbol = helper.get_fam(fam_name)
                 if not fam_symbol.IsActive:
@@ -205,10 +243,27 @@ if selection:
                 # correct level offset
                 correct_lvl_offset = new_fam_instance.get_Parameter(
                     DB.BuiltInParameter.INSTANCE_FREE_HOST_OFFSET_PARAM).Set(0)
+                segments_before, segments_after = simplify_report.get(room.Id, (0, 0))
                 print(
-                    "Created and placed family instance : {1} - {2} {0} ".format(
+                    "Created and placed family instance : {1} - {2} {0} "
+                    "({3} -> {4} boundary segments, {5:.0f} KB, loaded in {6:.2f}s)".format(
                         output.linkify(new_fam_instance.Id),
-                        fam_name, fam_type_name))
+                        fam_name, fam_type_name,
+                        segments_before, segments_after, fam_size / 1024.0, load_time))
+                total_size += fam_size
+                total_load_time += load_time
+                placed += 1
             except Exception as err:
                 logger.error(err)
 
+    print("Boundaries to extrusions: {:.2f}s for {} rooms".format(extrusion_time, len(selection)))
+    # run once with and once without simplification to compare the effect on the same rooms
+    segments_before = sum(before for before, after in simplify_report.values())
+    segments_after = sum(after for before, after in simplify_report.values())
+    print("Boundary simplification {}: {} -> {} boundary segments".format(
+        "on ({:.0f} mm)".format(simplify_tol * 304.8) if simplify_tol else "off",
+        segments_before, segments_after))
+    if placed:
+        print("Families: {:.0f} KB in total, {:.0f} KB average, loaded in {:.2f}s ({:.2f}s average)".format(
+            total_size / 1024.0, total_size / 1024.0 / placed, total_load_time, total_load_time / placed))
+    print(boundary.boundary_cache.report())
@@ -7,6 +7,7 @@ from Autodesk.Revit import Exceptions
 import tempfile
 import rpw
 from pyrevit.revit.db import query
+from pyHP import database
 
 
 # selection filter for rooms
@@ -97,20 +98,8 @@ def get_ref_lvl_plane(family_doc):
 
 
 def get_fam(family_name):
-    # get family symbol by family name, get any type
-    fam_bip_id = DB.ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM)
-    fam_bip_provider = DB.ParameterValueProvider(fam_bip_id)
-    if HOST_APP.is_newer_than(2022):
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name)
-    else:
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name, True)
-    fam_filter = DB.ElementParameterFilter(fam_filter_rule)
-
-    collector = DB.FilteredElementCollector(revit.doc) \
-        .WherePasses(fam_filter) \
-        .WhereElementIsElementType() \
-        .FirstElement()
-    return collector
+    # get family symbol by family name, get any type, from the document's family registry
+    return database.family_registry(revit.doc).any_type(family_name)
 
 
 def get_shared_param_by_name_type(sp_name, sp_type):
@@ -4,6 +4,7 @@ import tempfile
 import helper
 import re
 from pyrevit.revit.db import query
+from pyHP import shells, database
 
 logger = script.get_logger()
 output = script.get_output()
@@ -38,7 +39,12 @@ if selection:
 
     # iterate through rooms
     for room in selection:
-        mass_placement_point = room.get_BoundingBox(None).Min
+        # the freeform is moved to its bounding box minimum, place it at the shell's minimum
+        shell_bbox = shells.get_bbox(room)
+        if shell_bbox is None:
+            print("Skipped room {}, it is not placed or not enclosed".format(output.linkify(room.Id)))
+            continue
+        mass_placement_point = DB.XYZ(*shell_bbox[0])
         # define new family doc
         try:
             new_family_doc = revit.doc.Application.NewFamilyDocument(fam_template_path)
@@ -80,26 +86,24 @@ if selection:
 
         # Create extrusion from room boundaries
         with revit.Transaction(doc=new_family_doc, name="Create FreeForm Element"):
-            room_geo = room.ClosedShell
-            for geo in room_geo:
-                if isinstance(geo, DB.Solid) and geo.Volume > 0.0:
-                    freeform = DB.FreeFormElement.Create(new_family_doc, geo)
-                    new_family_doc.Regenerate()
-                    delta = DB.XYZ(0, 0, 0) - freeform.get_BoundingBox(None).Min
-                    move_ff = DB.ElementTransformUtils.MoveElement(
-                        new_family_doc, freeform.Id, delta
-                    )
-                    # create and associate a material parameter
+            for geo in shells.get_solids(room):
+                freeform = DB.FreeFormElement.Create(new_family_doc, geo)
+                new_family_doc.Regenerate()
+                delta = DB.XYZ(0, 0, 0) - freeform.get_BoundingBox(None).Min
+                move_ff = DB.ElementTransformUtils.MoveElement(
+                    new_family_doc, freeform.Id, delta
+                )
+                # create and associate a material parameter
 
-                    ext_mat_param = freeform.get_Parameter(DB.BuiltInParameter.MATERIAL_ID_PARAM)
-                    try:
-                        new_mat_param = new_family_doc.FamilyManager.AddParameter(sp_unit_material,
-                                                                                  DB.BuiltInParameterGroup.PG_MATERIALS,
-                                                                                  False)
-                        new_family_doc.FamilyManager.AssociateElementParameterToFamilyParameter(ext_mat_param,
-                                                                                                new_mat_param)
-                    except Exception as err:
-                        logger.error(err)
+                ext_mat_param = freeform.get_Parameter(DB.BuiltInParameter.MATERIAL_ID_PARAM)
+                try:
+                    new_mat_param = new_family_doc.FamilyManager.AddParameter(sp_unit_material,
+                                                                              DB.BuiltInParameterGroup.PG_MATERIALS,
+                                                                              False)
+                    new_family_doc.FamilyManager.AssociateElementParameterToFamilyParameter(ext_mat_param,
+                                                                                            new_mat_param)
+                except Exception as err:
+                    logger.error(err)
 
         # save and close family
         save_opt = DB.SaveOptions()
@@ -108,7 +112,7 @@ if selection:
 
         # Reload family with extrusion and place it in the same position as the room
         with revit.Transaction("Load Family", revit.doc):
-            loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+            loaded_f = database.family_registry(revit.doc).load(fam_path)
             # find family symbol and activate
             fam_symbol = helper.get_fam(fam_name)
             if not fam_symbol.IsActive:
@@ -124,3 +128,5 @@ if selection:
                 "Created and placed Mass family instance : {1} - {2} {0} ".format(
                     output.linkify(new_fam_instance.Id),
                     fam_name, fam_type_name))
+
+    print(shells.shell_cache.report())
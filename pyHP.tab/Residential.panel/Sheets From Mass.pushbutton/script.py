@@ -35,7 +35,7 @@ if ok1:
     # for k, v in mass_param_dict.items():
     #     if v == chosen_massparam_name:
     #         chosen_massparam = k
-    chosen_massparam = database.key_by_val(mass_param_dict, chosen_massparam_name)
+    chosen_massparam = mass_param_dict.id_of(chosen_massparam_name)
 else:
     sys.exit()
 
@@ -48,6 +48,13 @@ def key_or_none (dict, key):
         return None
 
 
+def warn_duplicates(label, id_name_map):
+    # the pickers show names only, a name shared by several elements resolves to the lowest id
+    for name, ids in id_name_map.duplicates().items():
+        print("{} '{}' is used by {} elements, id {} will be used".format(label, name, len(ids),
+                                                                         id_name_map.id_of(name)))
+
+
 category = DB.BuiltInCategory.OST_Mass
 ui.view_temp_dict = database.templates_dict()
 ui.viewport_dict = database.viewport_dict()
@@ -56,6 +63,10 @@ if not tb_types:
     forms.alert("There are no Titleblocks loaded in the model.", exitscript=True)
 ui.titleblock_dict = tb_types
 ui.schedule_dict = database.sh_dict(category)
+warn_duplicates("View Template", ui.view_temp_dict)
+warn_duplicates("Viewport Type", ui.viewport_dict)
+warn_duplicates("Titleblock", ui.titleblock_dict)
+warn_duplicates("Schedule", ui.schedule_dict)
 ui.set_titleblocks()
 ui.set_vp_types()
 ui.set_viewtemplates()
@@ -102,6 +113,9 @@ components2 = [
     # ComboBox(name="area_sh", options=sorted(ui.schedule_dict.values())),
     ComboBox(name="area_sh", options=sorted(ui.schedule_dict.values()), default=def_sh),
 
+    Separator(),
+    # diagnostic, reads the geometry of every mass
+    CheckBox("check_types", "Check layout types against mass outlines", default=False),
     Separator(),
     Button("Select"),
 ]
@@ -112,12 +126,13 @@ ok2 = form2.show()
 if ok2:
     # match the variables with user input
     chosen_sheet_nr = form2.values["sheet_number"]
-    chosen_vt_layout_id = database.key_by_val(ui.view_temp_dict, form2.values["vt_layout"])
-    chosen_vt_keyplan_id = database.key_by_val(ui.view_temp_dict, form2.values["vt_keyplan"])
-    chosen_tb_id = database.key_by_val(ui.titleblock_dict, form2.values["tb"])
-    chosen_vp_type_id = database.key_by_val(ui.viewport_dict, form2.values["vp_types"])
+    chosen_vt_layout_id = ui.view_temp_dict.id_of(form2.values["vt_layout"])
+    chosen_vt_keyplan_id = ui.view_temp_dict.id_of(form2.values["vt_keyplan"])
+    chosen_tb_id = ui.titleblock_dict.id_of(form2.values["tb"])
+    chosen_vp_type_id = ui.viewport_dict.id_of(form2.values["vp_types"])
     chosen_crop_offset = units.correct_input_units(form2.values["crop_offset"], revit.doc)
-    chosen_area_sh_id = database.key_by_val(ui.schedule_dict,form2.values["area_sh"])
+    chosen_area_sh_id = ui.schedule_dict.id_of(form2.values["area_sh"])
+    check_types = form2.values["check_types"]
 else:
     sys.exit()
 
@@ -131,6 +146,33 @@ ui.set_config("schedule", chosen_area_sh_id)
 
 all_mass = DB.FilteredElementCollector(revit.doc).OfCategory(DB.BuiltInCategory.OST_Mass).WhereElementIsNotElementType().ToElements()
 
+# levels hosting each layout type, collected in one pass over all masses
+layout_masses = {}
+levels_by_layout = {}
+for mass in all_mass:
+    param = mass.get_Parameter(chosen_massparam)
+    value = param.AsString() if param else None
+    if not value:
+        continue
+    layout_masses.setdefault(value, []).append(mass)
+    host = mass.Host
+    if isinstance(host, DB.Level):
+        levels_by_layout.setdefault(value, set()).add(host.Id)
+
+# on request, check the layout types against the geometry: identical outlines should share a type
+if check_types:
+    stacking = geo.stacking_index(m for masses in layout_masses.values() for m in masses)
+    type_by_id = dict((m.Id.IntegerValue, value) for value, masses in layout_masses.items() for m in masses)
+    for group in stacking.groups():
+        values = sorted(set(type_by_id[i] for i in group))
+        if len(values) > 1:
+            print("Masses with identical outlines have different types: {}".format(", ".join(values)))
+    group_by_id = dict((i, n) for n, group in enumerate(stacking.groups()) for i in group)
+    for value, masses in sorted(layout_masses.items()):
+        outlines = set(group_by_id[m.Id.IntegerValue] for m in masses if m.Id.IntegerValue in group_by_id)
+        if len(outlines) > 1:
+            print("Type {} is used by masses of {} different outlines".format(value, len(outlines)))
+
 all_view_filters = DB.FilteredElementCollector(revit.doc).OfClass(DB.FilterElement).ToElements()
 overrides = DB.OverrideGraphicSettings()
 overrides.SetSurfaceTransparency(1)
@@ -144,20 +186,25 @@ def create_filter_from_rules(rules):
     el_filter = DB.LogicalAndFilter(elem_filters)
     return el_filter
 
+# reserve the names of the planned layout plans, schedule headers and schedules in one batch
+layout_types = list(unique_types)
+view_names = database.name_allocator("view")
+layout_plan_names = dict(izip(layout_types, view_names.reserve_many(["Layout - " + t + " Plan" for t in layout_types])))
+header_texts = dict(izip(layout_types, view_names.reserve_many([t + " Area Schedule" for t in layout_types])))
+schedule_names = dict(izip(layout_types, database.name_allocator("schedule").reserve_many(
+    [t + " Mass Schedule" for t in layout_types])))
+# and one sheet number for each layout type
+sheet_numbers = dict(izip(layout_types, database.sheet_number_allocator().allocate(chosen_sheet_nr, len(layout_types))))
+
 with revit.Transaction("Create Flat Type Sheets", revit.doc):
-    for layout_type_name in unique_types:
+    for layout_type_name in layout_types:
 
         fam_instance = unique_types[layout_type_name]
         level = fam_instance.Host
         layout_plan = DB.ViewPlan.Create(revit.doc, fl_plan_type.Id, level.Id)
 
         # find all the levels with this element
-        all_levels_with_same_layout = []
-        for mass in all_mass:
-            if mass.get_Parameter(chosen_massparam).AsString() == layout_type_name:
-                host = mass.Host
-                if isinstance(host, DB.Level):
-                    all_levels_with_same_layout.append(host.Id)
+        all_levels_with_same_layout = levels_by_layout.get(layout_type_name, set())
 
         # create a filter for masses of the same unit type
         layout_filter_id = None
@@ -200,7 +247,7 @@ with revit.Transaction("Create Flat Type Sheets", revit.doc):
 
         # rename the view
         layout_name = "Layout - " + layout_type_name
-        layout_plan.Name = database.unique_view_name(layout_name, suffix=" Plan")
+        database.rename(layout_plan, layout_plan_names[layout_type_name])
 
         # sort key plans by level:
         kp_list = sorted(key_plans.items(), key=lambda x: revit.doc.GetElement(x[1]).Elevation, reverse=True)
@@ -208,7 +255,7 @@ with revit.Transaction("Create Flat Type Sheets", revit.doc):
         sorted_key_plans = dict(kp_list)
         for k in sorted_key_plans:
             keyplan_name = "Key Plan - " + layout_type_name + " - " + revit.doc.GetElement(sorted_key_plans[k]).Name
-            k.Name = database.unique_view_name(keyplan_name, suffix="")
+            database.rename(k, database.unique_view_name(keyplan_name, suffix=""))
             database.apply_vt(k, revit.doc.GetElement(DB.ElementId(chosen_vt_keyplan_id)))
 
         # apply view template
@@ -246,10 +293,11 @@ with revit.Transaction("Create Flat Type Sheets", revit.doc):
         td = area_schedule.GetTableData()
         tds = td.GetSectionData(DB.SectionType.Header)
         text = tds.GetCellText(0, 0)
-        tds.SetCellText(0, 0, database.unique_view_name(string_value_type, suffix=" Area Schedule"))
-        area_schedule.Name = database.unique_schedule_name(string_value_type, suffix=" Mass Schedule")
+        tds.SetCellText(0, 0, header_texts[layout_type_name])
+        database.rename(area_schedule, schedule_names[layout_type_name])
         # create sheet
-        sheet = database.create_sheet(chosen_sheet_nr, layout_name, DB.ElementId(chosen_tb_id))
+        sheet = database.create_sheet(sheet_numbers[layout_type_name], layout_name, DB.ElementId(chosen_tb_id),
+                                      preallocated=True)
 
         # get positions on sheet
         loc = locator.Locator(sheet, chosen_crop_offset, 'Vertical', 'Tiles', len(sorted_key_plans))
@@ -4,6 +4,7 @@ __doc__ = "Populate a window parameter with Orientation"
 from pyrevit import revit, DB, script, forms, HOST_APP
 from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button)
 import math
+from pyHP import database
 
 
 def get_true_north_angle():
@@ -64,11 +65,12 @@ def get_orientation_by_normal(normal):
 coll_windows = DB.FilteredElementCollector(revit.doc).OfCategory(
     DB.BuiltInCategory.OST_Windows).WhereElementIsNotElementType().ToElements()
 
-win_parameter_set = coll_windows[0].Parameters
-win_params_text = [p for p in win_parameter_set if p.StorageType.ToString() == "String" and p.Definition.VariesAcrossGroups]
-win_params_text.append(coll_windows[0].get_Parameter(DB.BuiltInParameter.ALL_MODEL_MARK))
+catalog = database.parameter_catalog(revit.doc)
+win_params_text = catalog.parameters(DB.BuiltInCategory.OST_Windows, instance=True, storage_type="String",
+                                     varies_across_groups=True)
+win_params_text.append(catalog.find(DB.BuiltInCategory.OST_Windows, DB.BuiltInParameter.ALL_MODEL_MARK, instance=True))
 
-win_dict1 = {p.Definition.Name: p for p in win_params_text}
+win_dict1 = {p.name: p for p in win_params_text if p}
 # construct rwp UI
 components = [
     Label("Which Windows parameter to populate:\n Must Vary across groups"),
@@ -90,8 +92,4 @@ with revit.Transaction("Windows Orientation"):
                 normal_to_wall = ext_side.FaceNormal.Normalize()
                 window_orientation = get_orientation_by_normal(normal_to_wall)
 
-                # TODO: chaned this ugly bit
-                if chosen_win_param.Definition.Name == "Mark":
-                    change = window.get_Parameter(DB.BuiltInParameter.ALL_MODEL_MARK).Set(str(window_orientation))
-                else:
-                    change = window.get_Parameter(chosen_win_param.GUID).Set(str(window_orientation))
+                change = database.lookup_parameter(window, chosen_win_param).Set(str(window_orientation))
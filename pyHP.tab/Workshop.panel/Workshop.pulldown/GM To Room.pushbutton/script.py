@@ -4,10 +4,13 @@ __doc__ = "Place rooms in the location of the generic model units"
 
 from itertools import izip
 from pyrevit import revit, DB, script, forms
+from pyHP import geo, database
 import clr
 
 from time import time
 
+output = script.get_output()
+
 # Gather GM
 coll_gm = DB.FilteredElementCollector(revit.doc) \
     .OfCategory(DB.BuiltInCategory.OST_GenericModel) \
@@ -17,28 +20,37 @@ coll_gm = DB.FilteredElementCollector(revit.doc) \
 # TODO: filter housing units only
 
 # Pick which parameters to copy
-parameters_names_list = []
-for g in coll_gm:
-
-    element_parameter_set = g.Parameters
-    for p in element_parameter_set:
-        parameter_name = p.Definition.Name
-        if parameter_name not in parameters_names_list:
-            parameters_names_list.append(parameter_name)
+parameters_names_list = database.parameter_catalog(revit.doc).names(DB.BuiltInCategory.OST_GenericModel, instance=True)
 
 #parameters_names_list.sort()
 #sel_parameter = forms.SelectFromList.show(parameters_names_list
 #                                                , button_name="Select Parameters"
 #                                                , multiselect=False)
 
+# get the center of the Bounding Box of each generic model element
+centers = []
+for gm in coll_gm:
+    bb = gm.get_BoundingBox(None)
+    centers.append((bb.Max + bb.Min)/2)
+
+# skip units that already have a room, the centers are located in one batch per level
+locator = geo.room_locator(revit.doc)
+by_level = {}
+for n, gm in enumerate(coll_gm):
+    by_level.setdefault(gm.LevelId.IntegerValue, []).append(n)
+in_room = [None] * len(centers)
+for level_id, indices in by_level.items():
+    for n, room in izip(indices, locator.rooms_at([centers[n] for n in indices], level_id)):
+        in_room[n] = room
+
 # Place rooms
 with revit.Transaction('Place Room', log_errors=False):
-    for gm in coll_gm:
+    for gm, center_bb, existing_room in izip(coll_gm, centers, in_room):
+        if existing_room:
+            print("Skipped {}, it is already inside room {}".format(
+                output.linkify(gm.Id), output.linkify(existing_room.Id)))
+            continue
         level = revit.doc.GetElement(gm.LevelId)
-        # get Bounding Box of generic model element
-        bb = gm.get_BoundingBox(None)
-        # get the center of Bounding Box
-        center_bb = (bb.Max + bb.Min)/2
 
         # specify UV
         u = center_bb.X
@@ -7,6 +7,7 @@ from Autodesk.Revit import Exceptions
 import tempfile
 import rpw
 from pyrevit.revit.db import query
+from pyHP import geo, boundary, spatial, database
 
 # selection filter for rooms
 class RoomsFilter(ISelectionFilter):
@@ -85,59 +86,18 @@ def preselection_with_filter (cat_name):
 
 
 def inverted_transform(element):
-    # get element location and return its inverted transform
-    # can be used to translate geometry to 0,0,0 origin to recreate geometry inside a family
-    el_location = element.Location.Point
-    bb = element.get_BoundingBox(revit.doc.ActiveView)
-    orig_cs = bb.Transform
-    # Creates a transform that represents a translation via the specified vector.
-    translated_cs = orig_cs.CreateTranslation(el_location)
-    # Transform from the room location point to origin
-    return translated_cs.Inverse
-
-
-def point_equal_list(pt, lst):
-    for el in list(lst):
-        if pt.IsAlmostEqualTo(el):
-            return el
-    else:
-        return None
-
-
-def get_open_ends(curves_list):
-    endpoints = []
-    for curve in curves_list:
-        for i in range(2):
-            duplicate = point_equal_list(curve.GetEndPoint(i), endpoints)
-            if duplicate:
-                endpoints.remove(duplicate)
-            else:
-                endpoints.append(curve.GetEndPoint(i))
-    if endpoints:
-        return endpoints
-    else:
-        return None
+    # translation from the element location point to origin
+    return geo.inverted_transform(element)
 
 
 def room_bound_to_origin (room, translation):
     # iterate through room boundaries and translate them close to the origin
     # also query open ends and return none if the loop is open
-    room_boundaries = DB.CurveArrArray()
-    # get room boundary segments
-    room_segments = room.GetBoundarySegments(DB.SpatialElementBoundaryOptions())
-    # iterate through loops of segments and add them to the array
-    for seg_loop in room_segments:
-        curve_loop = [s.GetCurve() for s in seg_loop]
-        open_ends = get_open_ends(curve_loop)
-        if open_ends:
+    # boundaries come from the pyHP boundary cache, repaired there by geo.heal_rooms
+    for seg_loop in boundary.get_loops(room):
+        if spatial.open_ends(seg_loop):
             return None
-        curve_array = DB.CurveArray()
-        for old_curve in curve_loop:
-            #old_curve = s.GetCurve()
-            new_curve = old_curve.CreateTransformed(translation)  # move curves to origin
-            curve_array.Append(new_curve)
-        room_boundaries.Append(curve_array)
-    return room_boundaries
+    return geo.room_bound_to_origin(room, translation)
 
 
 def get_ref_lvl_plane (family_doc):
@@ -148,13 +108,8 @@ def get_ref_lvl_plane (family_doc):
 
 
 def get_fam(some_name):
-    fam_name_filter = query.get_biparam_stringequals_filter({DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM: some_name})
-    found_fam = DB.FilteredElementCollector(revit.doc) \
-        .OfCategory(DB.BuiltInCategory.OST_GenericModel) \
-        .WherePasses(fam_name_filter) \
-        .WhereElementIsNotElementType().ToElements()
-
-    return found_fam
+    # get any type of a family by family name, from the document's family registry
+    return database.family_registry(revit.doc).any_type(some_name, DB.BuiltInCategory.OST_GenericModel)
 
 
 def get_family_slow_way(name):
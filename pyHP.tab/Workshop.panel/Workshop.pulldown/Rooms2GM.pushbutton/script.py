@@ -2,12 +2,15 @@ __title__ = "Room2GM"
 __doc__ = "Transforms rooms into Generic Model families. Carries over unit parameters. Copies tenure from name"
 
 from pyrevit import revit, DB, script, forms, HOST_APP
-from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button)
+from rpw.ui.forms import (FlexForm, Label, ComboBox, Separator, Button, CheckBox)
 import tempfile
+import sys
 import helper
 from pyrevit.revit.db import query
+from pyHP import geo, database
 
 logger = script.get_logger()
+output = script.get_output()
 
 # get shared parameter for the extrusion material
 
@@ -69,12 +72,32 @@ if selection:
     fam_template_path = "C:\ProgramData\Autodesk\RVT " + \
                         HOST_APP.version + "\Family Templates\English\Metric Generic Model.rft"
 
+    # boundary healing changes the sketched geometry, so it is off unless asked for
+    components = [
+        Label("Snap endpoints, drop zero-length and overlapping segments"),
+        Label("and close small gaps in the room boundaries."),
+        CheckBox("heal", "Repair room boundaries", default=False),
+        Separator(),
+        Button("Create")]
+    form = FlexForm("Rooms to Generic Models", components)
+    if not form.show():
+        sys.exit()
+
+    # repair small boundary defects of all rooms up front, so the batch completes in one go
+    if form.values["heal"]:
+        heal_summary = geo.heal_rooms(selection)
+        for room_id, actions in heal_summary.items():
+            print("Room {}: {}".format(output.linkify(room_id), geo.describe_healing(actions)))
+
     # iterate through rooms
     for room in selection:
         # helper: define inverted transform to translate room geometry to origin
         geo_translation = helper.inverted_transform(room)
         # collect room boundaries and translate them to origin
         room_boundaries = helper.room_bound_to_origin(room, geo_translation)
+        if not room_boundaries:
+            print("Skipped room {}, its boundary could not be closed".format(output.linkify(room.Id)))
+            continue
 
         # define new family doc
         try:
@@ -180,7 +203,7 @@ if selection:
         # Load Family into project
         with revit.Transaction("Load Family", revit.doc):
             try:
-                loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+                loaded_f = database.family_registry(revit.doc).load(fam_path)
                 revit.doc.Regenerate()
             except Exception as err:
                 logger.error(err)
@@ -212,49 +235,45 @@ if selection:
         # Reload family with extrusion and place it in the same position as the room
         with revit.Transaction("Reload Family", revit.doc):
             try:
-                loaded_f = revit.db.create.load_family(fam_path, doc=revit.doc)
+                loaded_f = database.family_registry(revit.doc).load(fam_path)
                 revit.doc.Regenerate()
                 str_type = DB.Structure.StructuralType.NonStructural
-                # find family symbol and activate
-                fam_symbol = None
-                get_fam = DB.FilteredElementCollector(revit.doc).OfClass(DB.FamilySymbol).OfCategory(
-                    DB.BuiltInCategory.OST_GenericModel).WhereElementIsElementType().ToElements()
-                for fam in get_fam:
-                    type_name = fam.get_Parameter(DB.BuiltInParameter.SYMBOL_NAME_PARAM).AsString()
-                    if str.strip(type_name) == fam_name:
-                        fam_symbol = fam
-                        fam_symbol.Name = fam_type_name
-                        # set type parameters
-                        fam_symbol.get_Parameter(DB.BuiltInParameter.ALL_MODEL_DESCRIPTION).Set(dept)
-                        fam_symbol.LookupParameter("Unit Area").Set(unit_area)
-                        if not fam_symbol.IsActive:
-                            fam_symbol.Activate()
-                            revit.doc.Regenerate()
-
-                        try:
-                            # set tenure
-                            fam_symbol.LookupParameter("Tenure").Set(tenure_code)
-                        except:
-                            pass
-                        try:
-                            # set unit type
-                            fam_symbol.LookupParameter("Unit Type").Set(unit_type)
-                        except:
-                            pass
-                        # place family symbol at position
-                        new_fam_instance = revit.doc.Create.NewFamilyInstance(room.Location.Point, fam_symbol, room.Level,
-                                                                              str_type)
-
-                        correct_lvl_offset = new_fam_instance.get_Parameter(
-                            DB.BuiltInParameter.INSTANCE_FREE_HOST_OFFSET_PARAM).Set(0)
-
-                        # set instance parameters
-                        # get Core Nr
-
-                        core_nr = room.LookupParameter("Core Nr").AsString()
-                        flat_orientation = room.LookupParameter("Flat Orientation").AsString()
-                        new_fam_instance.LookupParameter("Core Nr").Set(core_nr)
-                        new_fam_instance.LookupParameter("Flat Orientation").Set(flat_orientation)
+                # find family symbol of the loaded family and activate
+                fam_symbol = helper.get_fam(fam_name)
+                if fam_symbol:
+                    fam_symbol.Name = fam_type_name
+                    database.family_registry(revit.doc).update(fam_symbol)
+                    # set type parameters
+                    fam_symbol.get_Parameter(DB.BuiltInParameter.ALL_MODEL_DESCRIPTION).Set(dept)
+                    fam_symbol.LookupParameter("Unit Area").Set(unit_area)
+                    if not fam_symbol.IsActive:
+                        fam_symbol.Activate()
+                        revit.doc.Regenerate()
+
+                    try:
+                        # set tenure
+                        fam_symbol.LookupParameter("Tenure").Set(tenure_code)
+                    except:
+                        pass
+                    try:
+                        # set unit type
+                        fam_symbol.LookupParameter("Unit Type").Set(unit_type)
+                    except:
+                        pass
+                    # place family symbol at position
+                    new_fam_instance = revit.doc.Create.NewFamilyInstance(room.Location.Point, fam_symbol, room.Level,
+                                                                          str_type)
+
+                    correct_lvl_offset = new_fam_instance.get_Parameter(
+                        DB.BuiltInParameter.INSTANCE_FREE_HOST_OFFSET_PARAM).Set(0)
+
+                    # set instance parameters
+                    # get Core Nr
+
+                    core_nr = room.LookupParameter("Core Nr").AsString()
+                    flat_orientation = room.LookupParameter("Flat Orientation").AsString()
+                    new_fam_instance.LookupParameter("Core Nr").Set(core_nr)
+                    new_fam_instance.LookupParameter("Flat Orientation").Set(flat_orientation)
 
 
 
@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import adjacency
+
+
+def rectangle(x0, y0, x1, y1, z=0.0, wall=None, side=None):
+    # counterclockwise boundary, as Revit returns it; the side edge ("bottom" or "top") is bounded by wall
+    corners = [(x0, y0, z), (x1, y0, z), (x1, y1, z), (x0, y1, z)]
+    names = ["bottom", "right", "top", "left"]
+    segments = []
+    for i in range(4):
+        element = wall if names[i] == side else "{}_{}_{}".format(x0, y0, names[i])
+        segments.append((element, corners[i], corners[(i + 1) % 4]))
+    return segments
+
+
+def test_rooms_across_a_wall_are_neighbours():
+    # wall 100 between y=4 and y=4.2
+    graph = adjacency.AdjacencyGraph({
+        "A": rectangle(0, 0, 10, 4, wall=100, side="top"),
+        "B": rectangle(0, 4.2, 10, 8, wall=100, side="bottom"),
+    })
+    assert graph.neighbours("A") == ["B"]
+    assert abs(graph.shared_length("A", "B") - 10.0) < 1e-9
+    assert graph.shared_elements("A", "B") == {100}
+
+
+def test_rooms_on_the_same_side_are_not_neighbours():
+    # both rooms below wall 100, the second one over an overlapping stretch of it
+    graph = adjacency.AdjacencyGraph({
+        "A": rectangle(0, 0, 10, 4, wall=100, side="top"),
+        "B": rectangle(5, 1, 15, 4, wall=100, side="top"),
+    })
+    assert graph.neighbours("A") == []
+    assert graph.rooms_of(100) == {"A", "B"}
+
+
+def test_stacked_rooms_are_not_neighbours():
+    # the same plan on two levels: only the rooms on the same level are linked
+    boundaries = {
+        "A_L1": rectangle(0, 0, 10, 4, 0.0, wall=100, side="top"),
+        "C_L1": rectangle(0, 4.2, 10, 8, 0.0, wall=100, side="bottom"),
+        "B_L2": rectangle(0, 4.2, 10, 8, 3.0, wall=100, side="bottom"),
+    }
+    graph = adjacency.AdjacencyGraph(boundaries)
+    assert graph.neighbours("A_L1") == ["C_L1"]
+    assert graph.shared_length("A_L1", "B_L2") == 0.0
+
+
+def test_heights_keep_rooms_touching_at_a_floor_apart():
+    boundaries = {
+        "A": rectangle(0, 0, 10, 4, wall=100, side="top"),
+        "B": rectangle(0, 4.2, 10, 8, wall=100, side="bottom"),
+    }
+    graph = adjacency.AdjacencyGraph(boundaries, heights={"A": (0.0, 3.0), "B": (3.0, 6.0)})
+    assert graph.neighbours("A") == []
+    graph = adjacency.AdjacencyGraph(boundaries, heights={"A": (0.0, 3.0), "B": (1.0, 6.0)})
+    assert graph.neighbours("A") == ["B"]
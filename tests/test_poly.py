@@ -0,0 +1,172 @@
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import poly
+
+
+def distance_to_outline(xy, x, y):
+    pts = poly.to_points(xy)
+    best = None
+    for i in range(len(pts)):
+        (ax, ay), (bx, by) = pts[i - 1], pts[i]
+        dx, dy = bx - ax, by - ay
+        t = max(0.0, min(1.0, ((x - ax) * dx + (y - ay) * dy) / (dx * dx + dy * dy)))
+        d = math.hypot(x - ax - t * dx, y - ay - t * dy)
+        best = d if best is None else min(best, d)
+    return best
+
+
+def acute_triangle(degrees):
+    # isosceles triangle with its tip at the origin, counterclockwise
+    half = math.radians(degrees) / 2
+    return poly.to_xy([(0.0, 0.0), (10 * math.cos(half), -10 * math.sin(half)),
+                       (10 * math.cos(half), 10 * math.sin(half))])
+
+
+def test_offset_square_is_exact():
+    square = poly.to_xy([(0, 0), (4, 0), (4, 4), (0, 4)])
+    grown = poly.offset(square, 1.0)
+    assert abs(poly.area(grown) - 36.0) < 1e-9
+    shrunk = poly.offset(square, -1.0)
+    assert abs(poly.area(shrunk) - 4.0) < 1e-9
+
+
+def test_offset_acute_corner_is_bevelled_at_distance():
+    triangle = acute_triangle(10)
+    grown = poly.offset(triangle, 1.0, miter_limit=4.0)
+    # the 10 degree tip would need a mitre of 1 / sin(5 deg) = 11.5, it gets two bevel points instead
+    assert len(grown) == 2 * 4
+    for x, y in poly.to_points(grown):
+        d = distance_to_outline(triangle, x, y)
+        assert d >= 1.0 - 1e-9
+        assert d <= 4.0
+        assert not poly.contains(triangle, x, y)
+
+
+def test_offset_acute_corner_within_limit_is_mitred():
+    triangle = acute_triangle(60)
+    grown = poly.offset(triangle, 1.0, miter_limit=4.0)
+    # an equilateral triangle grows into an equilateral triangle, every corner at 2 from the original
+    assert len(grown) == 2 * 3
+    for (x, y), (px, py) in zip(poly.to_points(grown), poly.to_points(triangle)):
+        assert abs(math.hypot(x - px, y - py) - 2.0) < 1e-9
+
+
+def test_inward_offset_of_acute_corner_keeps_true_mitre():
+    triangle = acute_triangle(10)
+    shrunk = poly.offset(triangle, -0.2, miter_limit=4.0)
+    # the inset of a triangle is a similar triangle, each edge 0.2 in
+    assert len(shrunk) == 2 * 3
+    for x, y in poly.to_points(shrunk):
+        assert poly.contains(triangle, x, y)
+        assert abs(distance_to_outline(triangle, x, y) - 0.2) < 1e-9
+
+
+def test_offset_keeps_clockwise_winding():
+    triangle = poly.to_xy(list(reversed(poly.to_points(acute_triangle(10)))))
+    grown = poly.offset(triangle, 1.0)
+    assert poly.area(grown) < 0
+    assert len(grown) == 2 * 4
+
+
+def test_contains_empty_loop():
+    assert not poly.contains(poly.to_xy([]), 0.0, 0.0)
+    assert not poly.contains_loops([], 0.0, 0.0)
+
+
+def brute_unique_axes(axes, tol):
+    # the reference semantics: keep an axis unless its point is within tol of the line of an earlier
+    # kept axis, whatever that axis' direction (as the original get_unique_borders)
+    kept = []
+    for index, (pt, d) in enumerate(axes):
+        length = math.hypot(d[0], d[1])
+        if not length:
+            continue
+        duplicate = False
+        for j in kept:
+            (px, py), (vx, vy) = axes[j]
+            vl = math.hypot(vx, vy)
+            if abs(vx * (pt[1] - py) - vy * (pt[0] - px)) / vl <= tol:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(index)
+    return kept
+
+
+def test_unique_axes_first_one_wins():
+    axes = [((0, 0), (1, 0)), ((5, 0.001), (-1, 0)), ((0, 1), (1, 0)), ((2, 2), (0, 1)), ((3, 0.002), (1, 0))]
+    assert poly.unique_axes(axes, 0.003) == [0, 2, 3]
+
+
+def test_unique_axes_point_on_a_crossing_axis():
+    # an axis whose point lies on a kept axis of another direction is dropped too
+    axes = [((0, 0), (1, 0)), ((7, 0.002), (0, 1)), ((7, 5), (0, 1)), ((7.001, 9), (1, 1))]
+    assert poly.unique_axes(axes, 0.003) == [0, 2]
+
+
+def test_unique_axes_far_from_origin():
+    # two axes about half a degree apart meeting 100 m out: the second one's point lies on the first line
+    angle = math.radians(0.5)
+    origin = (100000.0, 100000.0)
+    first = (origin, (math.cos(angle), math.sin(angle)))
+    # a point 2 m along the first line, with a direction back at 0 degrees
+    pt = (origin[0] + 2 * math.cos(angle), origin[1] + 2 * math.sin(angle))
+    second = (pt, (1.0, 0.0))
+    assert poly.unique_axes([first, second], 0.003) == [0]
+    # and a parallel one 1 m to the side is kept
+    third = ((origin[0], origin[1] + 1.0), (1.0, 0.0))
+    assert poly.unique_axes([first, second, third], 0.003) == [0, 2]
+
+
+def test_unique_axes_across_the_seam():
+    # directions of 0.2 and 179.9 degrees are nearly collinear lines
+    a, b = math.radians(0.2), math.radians(179.9)
+    axes = [((5000.0, 3000.0), (math.cos(a), math.sin(a))),
+            ((5000.0 + 3 * math.cos(a), 3000.0 + 3 * math.sin(a)), (math.cos(b), math.sin(b)))]
+    assert poly.unique_axes(axes, 0.003) == [0]
+
+
+def test_unique_axes_matches_pairwise_comparison():
+    import random
+    random.seed(3)
+    axes = []
+    for i in range(400):
+        x, y = random.uniform(-50000, 50000), random.uniform(-50000, 50000)
+        a = random.choice([0.0, QUARTER_TURN, math.radians(30)]) + random.uniform(-0.004, 0.004)
+        axes.append(((x, y), (math.cos(a), math.sin(a))))
+        # a few near duplicates of earlier axes, a short way along them
+        if i % 3 == 0:
+            (px, py), (dx, dy) = axes[random.randrange(len(axes))]
+            s = random.uniform(-20, 20)
+            axes.append(((px + s * dx, py + s * dy + random.uniform(-0.002, 0.002)), (dx, dy)))
+    assert poly.unique_axes(axes, 0.003) == brute_unique_axes(axes, 0.003)
+
+
+QUARTER_TURN = 0.5 * math.pi
+
+
+def square_loop(corners):
+    return [(corners[i - 1], corners[i], poly._mid3(corners[i - 1], corners[i]), False)
+            for i in range(len(corners))]
+
+
+def test_heal_loop_ignores_float_noise():
+    segments = square_loop([(0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (4.0, 4.0, 0.0), (0.0, 4.0, 0.0)])
+    start, end, mid, is_arc = segments[2]
+    segments[2] = ((start[0] + 1e-12, start[1] - 1e-12, 0.0), end, mid, is_arc)
+    healed, actions = poly.heal_loop(segments)
+    assert actions["snapped"] == 0
+    assert len(healed) == 4
+
+
+def test_heal_loop_counts_real_snaps():
+    segments = square_loop([(0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (4.0, 4.0, 0.0), (0.0, 4.0, 0.0)])
+    start, end, mid, is_arc = segments[2]
+    segments[2] = ((start[0] + 0.001, start[1], 0.0), end, mid, is_arc)
+    healed, actions = poly.heal_loop(segments)
+    assert actions["snapped"] == 1
+    assert len(healed) == 4
@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from pyHP import spatial
+
+
+def square(x, y, size=4.0):
+    pts = [(x, y, 0.0), (x + size, y, 0.0), (x + size, y + size, 0.0), (x, y + size, 0.0)]
+    return [(pts[i - 1], pts[i]) for i in range(4)]
+
+
+def test_open_ends_closed_loop():
+    assert spatial.open_ends(square(0.0, 0.0)) == []
+
+
+def test_open_ends_within_tolerance_and_2d_points():
+    segments = [((0.0, 0.0), (1.0, 0.0)), ((1.001, 0.0), (1.0, 1.0)), ((1.0, 1.0), (0.0, 0.002))]
+    assert spatial.open_ends(segments) == []
+    assert spatial.open_ends(segments[:2]) == [(0.0, 0.0), (1.0, 1.0)]
+
+
+def test_open_ends_many_open_segments_use_the_grid():
+    # more open ends than the short list holds, shuffled so they are not chained
+    random.seed(3)
+    segments = []
+    for n in range(10):
+        segments.extend(square(10.0 * n, 0.0))
+    segments.append(((500.0, 0.0, 0.0), (501.0, 0.0, 0.0)))
+    random.shuffle(segments)
+    assert sorted(spatial.open_ends(segments)) == [(500.0, 0.0, 0.0), (501.0, 0.0, 0.0)]
+
+
+def test_grid_exact_duplicates():
+    grid = spatial.PointGrid(0.003)
+    a = (1.0, 2.0, 0.0)
+    b = (1.0, 2.0, 0.0)
+    grid.add(a)
+    grid.add(b)
+    grid.remove(a)
+    assert grid.find((1.0, 2.0, 0.0)) is b
+    assert grid.toggle((1.001, 2.0, 0.0))
+    assert grid.find((1.0, 2.0, 0.0)) is None
+    assert len(grid) == 0
+
+
+def test_grid_matches_across_cell_borders():
+    grid = spatial.PointGrid(0.003)
+    size = grid.size
+    border = 0.5 * size
+    grid.add((border - 0.0008, -border + 0.0008, border + 0.0008))
+    assert grid.find((border + 0.0008, -border - 0.0008, border - 0.0008)) is not None
+    assert grid.find((border + 0.01, 0.0, 0.0)) is None